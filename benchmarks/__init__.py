@@ -0,0 +1 @@
+"""Micro-benchmarks run against local stub servers."""
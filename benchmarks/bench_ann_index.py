@@ -0,0 +1,94 @@
+"""
+Benchmark recall vs latency of the local ANN index (IVF / IVF-PQ) against exact search.
+
+Uses the retail chunks saved by upload_retail_pdf.py (LOCAL_INDEX_DIR) when
+present. The real corpus is small, so it is grown to --size rows with noisy
+copies of the chunk embeddings; without a saved index, synthetic
+low-rank embeddings are used. Queries are perturbed chunk embeddings.
+
+Run from the repository root:
+    python -m benchmarks.bench_ann_index
+    python -m benchmarks.bench_ann_index --size 300000 --dimension 512
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import benchmarks.fakes  # noqa: F401  (dummy settings)
+from config.settings import settings
+from src.ann_index import IVFPQIndex, top_k_rows
+from src.local_index import LocalVectorIndex, local_index_path
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def load_corpus(size: int, dimension: int, rng: np.random.Generator) -> tuple[np.ndarray, str]:
+    """Return (normalized vectors, description) of the benchmark corpus."""
+    path = local_index_path(settings.local_index_dir, settings.pinecone_retail_index)
+    if os.path.exists(path):
+        index = LocalVectorIndex.load(path)
+        base = np.vstack([ns.vectors for ns in index.namespaces.values()])
+        label = f"{len(base)} retail chunks from {path}"
+    else:
+        # Low-rank latent structure, so neighbourhoods overlap like real embeddings do
+        latent = rng.standard_normal((max(size // 20, 1), 32)).astype(np.float32)
+        base = latent @ rng.standard_normal((32, dimension)).astype(np.float32)
+        label = f"{len(base)} synthetic embeddings (no {path})"
+    repeats = -(-size // len(base))
+    noise = rng.standard_normal((len(base) * repeats, base.shape[1])).astype(np.float32) * 1.0 / np.sqrt(base.shape[1])
+    vectors = _normalize(np.tile(_normalize(base), (repeats, 1)) + noise)[:size]
+    return vectors, f"{label}, grown to {len(vectors)} x {vectors.shape[1]}"
+
+
+def measure(search, queries: np.ndarray, truth: list, top_k: int) -> tuple[float, float]:
+    """Return (mean latency in ms, recall@top_k) of a search function."""
+    found = []
+    start = time.perf_counter()
+    for query in queries:
+        found.append(search(query))
+    latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+    recall = np.mean([len(set(f[:top_k]) & t) / top_k for f, t in zip(found, truth)])
+    return latency_ms, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN recall vs latency benchmark")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=256, help="Synthetic dimension (ignored for real chunks)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", "--top-k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--pq-m", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors, label = load_corpus(args.size, args.dimension, rng)
+    queries = vectors[rng.choice(len(vectors), size=args.queries, replace=False)]
+    queries = _normalize(queries + rng.standard_normal(queries.shape).astype(np.float32) * 0.3 / np.sqrt(vectors.shape[1]))
+    print(f"Corpus: {label}; {args.queries} queries, top_k={args.top_k}")
+
+    def exact(query):
+        return top_k_rows(vectors @ query, args.top_k)
+
+    truth = [set(exact(query).tolist()) for query in queries]
+    latency, _ = measure(exact, queries, truth, args.top_k)
+    print(f"{'exact (brute force)':<34} {latency:8.3f}ms/query  recall@{args.top_k}=1.000")
+
+    for pq_m in (0, args.pq_m):
+        start = time.perf_counter()
+        ann = IVFPQIndex.build(vectors, nlist=args.nlist, pq_m=pq_m)
+        kind = f"IVF{ann.nlist}" + (f",PQ{pq_m}" if pq_m else "")
+        print(f"-- built {kind} in {time.perf_counter() - start:.1f}s")
+        for nprobe in (1, 4, 8, 16, 32):
+            for rerank in ((0, 100) if pq_m else (0,)):
+                ann.nprobe, ann.rerank = nprobe, rerank
+                latency, recall = measure(lambda q: ann.search(q, args.top_k, vectors)[0], queries, truth, args.top_k)
+                name = f"{kind} nprobe={nprobe}" + (f" rerank={rerank}" if pq_m else "")
+                print(f"{name:<34} {latency:8.3f}ms/query  recall@{args.top_k}={recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
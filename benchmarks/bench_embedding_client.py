@@ -0,0 +1,84 @@
+"""
+Benchmark per-query embedding latency: new OpenAI client per query vs shared pooled client.
+
+Run from the repository root:
+    python -m benchmarks.bench_embedding_client
+"""
+
+import argparse
+import statistics
+import time
+from openai import OpenAI
+from benchmarks.stub_server import StubServer
+from src.clients import build_openai_client
+
+DIMENSION = 1536
+
+
+def _embeddings_route(body: dict):
+    inputs = body.get("input")
+    inputs = inputs if isinstance(inputs, list) else [inputs]
+    return 200, {
+        "object": "list",
+        "model": body.get("model"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": [0.001] * DIMENSION}
+            for i in range(len(inputs))
+        ],
+        "usage": {"prompt_tokens": 8, "total_tokens": 8}
+    }
+
+
+def _timed(fn, iterations: int) -> list:
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(f"What does Article {i % 7 + 1} of the Constitution say?")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean={statistics.mean(timings):7.3f}ms  p50={statistics.median(timings):7.3f}ms  p95={p95:7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding client latency benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+    
+    with StubServer({"/v1/embeddings": _embeddings_route}) as server:
+        base_url = f"{server.url}/v1"
+        
+        def per_query_client(query: str):
+            # Previous behaviour of PineconeRAG._get_query_embedding
+            client = OpenAI(api_key="sk-bench", base_url=base_url)
+            client.embeddings.create(model="text-embedding-3-small", input=query)
+        
+        shared = build_openai_client(api_key="sk-bench", base_url=base_url)
+        
+        def shared_client(query: str):
+            shared.embeddings.create(model="text-embedding-3-small", input=query)
+        
+        # Warm up imports and the shared pool
+        per_query_client("warm-up")
+        shared_client("warm-up")
+        
+        connections_before = server.connections
+        before = _timed(per_query_client, args.iterations)
+        before_connections = server.connections - connections_before
+        
+        connections_before = server.connections
+        after = _timed(shared_client, args.iterations)
+        after_connections = server.connections - connections_before
+    
+    print(f"Embedding latency over {args.iterations} queries (local stub server)")
+    _report("before: client per query", before)
+    _report("after: shared pooled client", after)
+    print(f"New TCP connections: before={before_connections}, after={after_connections}")
+
+
+if __name__ == "__main__":
+    main()
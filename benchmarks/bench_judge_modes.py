@@ -0,0 +1,165 @@
+"""
+Benchmark multi-criteria judging: one completion per criteria (evaluate_many) vs a single pass (evaluate_combined).
+
+By default the judge is a local stub modelling a llama.cpp server: a fixed
+number of slots, a prefill cost per prompt token not found in the slot's
+KV cache (cache_prompt), and a decode cost per generated token. The stub
+runs slots fully in parallel, which is the best case for the fan-out.
+Pass --url to run the same comparison against a real judge server.
+
+Run from the repository root:
+    python -m benchmarks.bench_judge_modes
+    python -m benchmarks.bench_judge_modes --slots 1 --questions 10
+    python -m benchmarks.bench_judge_modes --url http://10.10.10.10:8080
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from benchmarks.stub_server import StubServer
+from fast_evaluation_client import FastEvaluationClient
+from fast_utils import get_criteria_from_csv
+
+CRITERIA_NAMES = ("Contextual_Hallucination", "Accuracy", "Succinctness", "Hallucination_Score")
+
+# Object keys in the grammar, e.g. "\"Accuracy\""
+GRAMMAR_KEY = re.compile(r'"\\"(.+?)\\""')
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def make_judge(slots: int, prefill_ms: float, decode_ms: float, seed: int = 0):
+    """/completion, /props and /health routes of a simulated judge server."""
+    rng = random.Random(seed)
+    slot_locks = [threading.Lock() for _ in range(slots)]
+    slot_prompts = [""] * slots
+    choose_lock = threading.Lock()
+
+    def acquire(slot, prompt):
+        if slot is not None:
+            slot_locks[slot % slots].acquire()
+            return slot % slots
+        # Like llama.cpp: the idle slot whose cached prompt shares the longest prefix
+        while True:
+            with choose_lock:
+                idle = [i for i, lock in enumerate(slot_locks) if not lock.locked()]
+                if idle:
+                    best = max(idle, key=lambda i: _common_prefix(prompt, slot_prompts[i]))
+                    slot_locks[best].acquire()
+                    return best
+            time.sleep(0.001)
+
+    def completion(body: dict):
+        prompt = body.get("prompt", "")
+        keys = GRAMMAR_KEY.findall(body.get("grammar", ""))
+        slot = acquire(body.get("id_slot"), prompt)
+        try:
+            # Roughly 4 characters per token
+            cached = _common_prefix(prompt, slot_prompts[slot]) // 4 if body.get("cache_prompt") else 0
+            prompt_n = len(prompt) // 4
+            content = json.dumps({key: rng.randint(1, 5) for key in keys})
+            predicted_n = 2 + 4 * len(keys)
+            prompt_ms = (prompt_n - cached) * prefill_ms
+            predicted_ms = predicted_n * decode_ms
+            time.sleep((prompt_ms + predicted_ms) / 1000)
+            slot_prompts[slot] = prompt
+        finally:
+            slot_locks[slot].release()
+        return 200, {
+            "content": content,
+            "tokens_cached": cached,
+            "timings": {
+                "prompt_n": prompt_n - cached,
+                "prompt_ms": prompt_ms,
+                "predicted_n": predicted_n,
+                "predicted_ms": predicted_ms,
+                "cache_n": cached
+            }
+        }
+
+    return {
+        "/completion": completion,
+        "/props": lambda body: (200, {"total_slots": slots}),
+        "/health": lambda body: (200, {"status": "ok"})
+    }
+
+
+def _sample(i: int) -> dict:
+    context = " ".join(f"Passage {i}.{j}: store hours, returns policy and membership details." for j in range(60))
+    return {
+        "question": f"Question {i}: what is the returns policy?",
+        "answer": f"Answer {i}: items can be returned within 30 days with a receipt.",
+        "context": context,
+        "ground_truth": ""
+    }
+
+
+def _run(name: str, evaluate, criteria: dict, questions: int) -> None:
+    timings = []
+    prefill_ms = 0.0
+    prompt_tokens = 0
+    failures = 0
+    for i in range(questions):
+        start = time.perf_counter()
+        result = evaluate(criteria=criteria, **_sample(i))
+        timings.append((time.perf_counter() - start) * 1000)
+        if not result or len(result["criteria"]) != len(criteria):
+            failures += 1
+            continue
+        entries = [result] if "timings" in result else result["criteria"]
+        for entry in entries:
+            if entry.get("timings"):
+                prefill_ms += entry["timings"]["prompt_ms"]
+                prompt_tokens += entry["timings"]["prompt_tokens"]
+    print(
+        f"{name:<28} mean={statistics.mean(timings):8.1f}ms  max={max(timings):8.1f}ms  "
+        f"prefilled={prompt_tokens / questions:7.0f} tok/question ({prefill_ms / questions:.1f}ms)  "
+        f"failed={failures}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan-out vs single-pass multi-criteria judge benchmark")
+    parser.add_argument("--url", help="Real judge server base URL (default: local stub)")
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--slots", type=int, default=4, help="Stub server parallel slots")
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prefill cost per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=10.0, help="Stub decode cost per generated token")
+    parser.add_argument("--pin-slots", action="store_true", help="Pin each criteria prefix to one server slot")
+    args = parser.parse_args()
+
+    criteria = {}
+    for name in CRITERIA_NAMES:
+        prompt = get_criteria_from_csv("criteria.csv", name)
+        if not prompt:
+            raise SystemExit(f"Criteria '{name}' not found in criteria.csv")
+        criteria[name] = prompt
+    print(f"{len(criteria)} criteria, {args.questions} questions")
+
+    def compare(base_url: str) -> None:
+        client = FastEvaluationClient(base_url, pin_slots=args.pin_slots)
+        connections = client.warm_up()
+        print(f"Judge slots: {client.slot_count or 'unknown'} ({connections} connections warmed)")
+        _run("fan-out (evaluate_many)", client.evaluate_many, criteria, args.questions)
+        _run("single pass (combined)", client.evaluate_combined, criteria, args.questions)
+
+    if args.url:
+        compare(args.url.rstrip("/"))
+    else:
+        with StubServer(make_judge(args.slots, args.prefill_ms, args.decode_ms)) as server:
+            compare(server.url)
+
+
+if __name__ == "__main__":
+    main()
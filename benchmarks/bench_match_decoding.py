@@ -0,0 +1,75 @@
+"""
+Benchmark per-query CPU time of decoding Pinecone matches into context text.
+
+Compares the previous decoding (to_dict() of the whole response plus a chain
+of metadata.get() calls per match) with MatchDecoder.
+
+Run from the repository root:
+    python -m benchmarks.bench_match_decoding
+"""
+
+import argparse
+import time
+from benchmarks.fakes import FakeIndex, make_chunks
+from src.match_decoding import MatchDecoder
+
+
+def legacy_decode(query_response) -> str:
+    """The decoding retrieve_context performed before MatchDecoder."""
+    if hasattr(query_response, 'to_dict'):
+        results = query_response.to_dict().get('matches', [])
+    else:
+        results = query_response.matches
+    context_parts = []
+    for match in results:
+        metadata = match.get('metadata', {}) if isinstance(match, dict) else getattr(match, 'metadata', {})
+        if isinstance(metadata, dict):
+            text = (
+                metadata.get('text', '') or
+                metadata.get('content', '') or
+                metadata.get('chunk', '') or
+                metadata.get('page_content', '') or
+                metadata.get('document', '') or
+                metadata.get('value', '') or
+                str(metadata) if metadata else ''
+            )
+        else:
+            text = str(metadata) if metadata else ''
+        if text and text.strip():
+            context_parts.append(text)
+    return "\n\n".join(context_parts)
+
+
+def decoder_decode(decoder: MatchDecoder, query_response) -> str:
+    context_parts = []
+    for match in decoder.get_matches(query_response):
+        text = decoder.get_text(match)
+        if text and text.strip():
+            context_parts.append(text)
+    return "\n\n".join(context_parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match decoding CPU benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    parser.add_argument("-k", "--top-k", type=int, default=50)
+    args = parser.parse_args()
+    
+    index = FakeIndex(make_chunks(args.top_k))
+    response = index.query(top_k=args.top_k)
+    decoder = MatchDecoder("benchmark-index")
+    assert legacy_decode(response) == decoder_decode(decoder, response)
+    
+    for label, fn in (
+        ("legacy to_dict + get chain", lambda: legacy_decode(response)),
+        ("MatchDecoder", lambda: decoder_decode(decoder, response)),
+    ):
+        start = time.process_time()
+        for _ in range(args.iterations):
+            fn()
+        cpu_us = (time.process_time() - start) / args.iterations * 1e6
+        print(f"{label:<28} {cpu_us:9.1f}us CPU/query (top_k={args.top_k})")
+
+
+if __name__ == "__main__":
+    main()
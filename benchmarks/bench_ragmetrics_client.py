@@ -0,0 +1,135 @@
+"""
+Benchmark RagMetricsClient against a local stub server: per-call requests.post vs pooled Session.
+
+The stub answers like /v2/single-evaluation/ and throttles (429) or fails
+(503) a configurable share of requests, so the run also shows the retry
+behaviour and the per-status latency histograms. The run asserts that the
+pooled client reuses one connection, retries 503s and does not repeat a
+POST answered with 500 (evaluations are not idempotent).
+
+Run from the repository root:
+    python -m benchmarks.bench_ragmetrics_client
+    python -m benchmarks.bench_ragmetrics_client --requests 200 --failure-rate 0.2
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+import requests
+import benchmarks.fakes  # noqa: F401  (dummy settings)
+from benchmarks.stub_server import StubServer
+from src.ragmetrics_client import RagMetricsClient
+
+PATH = "/v2/single-evaluation/"
+
+
+def make_route(failure_rate: float, seed: int = 0):
+    """Evaluation route failing roughly failure_rate of requests with 429 or 503."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def route(body: dict):
+        with lock:
+            roll = rng.random()
+        if roll < failure_rate / 2:
+            return 429, {"detail": "throttled"}
+        if roll < failure_rate:
+            return 503, {"detail": "unavailable"}
+        return 200, {"results": [{"criteria": "Hallucination", "score": 1, "reason": "stub"}]}
+
+    return route
+
+
+def make_scripted_route(statuses: list):
+    """Route answering with the given statuses in order (then 200), counting requests."""
+    calls = []
+
+    def route(body: dict):
+        status = statuses[len(calls)] if len(calls) < len(statuses) else 200
+        calls.append(status)
+        if status != 200:
+            return status, {"detail": "scripted"}
+        return 200, {"results": [{"criteria": "Hallucination", "score": 1, "reason": "stub"}]}
+
+    return route, calls
+
+
+def check_retry_policy(client: RagMetricsClient) -> None:
+    """Assert which failures are retried: 503 is, 500 is not (it may already be recorded)."""
+    route, calls = make_scripted_route([503, 503])
+    with StubServer({PATH: route}) as server:
+        client.endpoint = server.url + PATH
+        assert client.send_evaluation("q", "answer", "context"), "503s should be retried until success"
+        assert len(calls) == 3, f"expected 2 retries after 503, got {len(calls) - 1}"
+
+    route, calls = make_scripted_route([500])
+    with StubServer({PATH: route}) as server:
+        client.endpoint = server.url + PATH
+        assert client.send_evaluation("q", "answer", "context") is None, "a 500 should be returned, not retried"
+        assert len(calls) == 1, f"a 500 must not be retried, got {len(calls)} POSTs"
+    print("Retry policy: 503 retried, 500 not retried - OK")
+
+
+def _timed(fn, iterations: int) -> list:
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(name: str, timings: list, connections: int) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<32} mean={statistics.mean(timings):7.2f}ms  p95={p95:7.2f}ms  connections={connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RagMetrics client benchmark against a stub server")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.005, help="Stub server delay per request in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Share of 429/503 responses")
+    args = parser.parse_args()
+
+    client = RagMetricsClient(eval_group_id="benchmark")
+    # Keep retries fast against the stub
+    client.backoff, client.backoff_max = 0.01, 0.05
+
+    with StubServer({PATH: make_route(0.0)}, latency=args.latency) as server:
+        endpoint = server.url + PATH
+        headers = {"Authorization": "Token benchmark", "Content-Type": "application/json"}
+        baseline = _timed(
+            lambda i: requests.post(endpoint, json={"question": f"q{i}"}, headers=headers, timeout=30),
+            args.requests
+        )
+        _report("requests.post per call", baseline, server.connections)
+
+    with StubServer({PATH: make_route(0.0)}, latency=args.latency) as server:
+        client.endpoint = server.url + PATH
+        pooled = _timed(lambda i: client.send_evaluation(f"q{i}", "answer", "context"), args.requests)
+        _report("pooled Session", pooled, server.connections)
+        assert server.connections == 1, f"pooled Session opened {server.connections} connections for sequential calls"
+
+    client.latency.clear()
+    with StubServer({PATH: make_route(args.failure_rate)}, latency=args.latency) as server:
+        client.endpoint = server.url + PATH
+        results = []
+        timings = _timed(lambda i: results.append(client.send_evaluation(f"q{i}", "answer", "context")), args.requests)
+        _report(f"pooled Session, {args.failure_rate:.0%} 429/503", timings, server.connections)
+        print(f"  succeeded after retries: {sum(1 for r in results if r)}/{len(results)}")
+
+    check_retry_policy(client)
+
+    print("Latency histograms per status code:")
+    for status, stats in sorted(client.latency_stats().items(), key=lambda item: str(item[0])):
+        print(
+            f"  {status}: count={stats['count']} mean={stats['mean_ms']:.2f}ms max={stats['max_ms']:.2f}ms "
+            f"p95<={stats['p95_ms']:g}ms buckets={stats['buckets']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark the logging cost of PineconeRAG.retrieve_context at WARNING level.
+
+Compares the current hot path against the same path plus the eager INFO
+f-string logging retrieve_context used to do, and counts how often the
+Pinecone response is stringified.
+
+Run from the repository root:
+    python -m benchmarks.bench_retrieval_logging
+"""
+
+import argparse
+import logging
+import time
+from benchmarks.fakes import FakeQueryResponse, make_rag
+
+logger = logging.getLogger("src.pinecone_rag")
+
+
+def legacy_logging(query: str, embedding, query_response, results) -> None:
+    """Replays the per-query INFO logging retrieve_context performed before tracing."""
+    logger.info(f"Starting Pinecone query for: '{query}'")
+    logger.info(f"Embedding generated: dimension={len(embedding)}, first 5 values={embedding[:5]}")
+    logger.info(f"Pinecone query completed. Response type: {type(query_response)}")
+    logger.info(f"Response: {query_response}")
+    response_dict = query_response.to_dict()
+    logger.info(f"Converted to dict. Keys: {list(response_dict.keys())}")
+    first_result = response_dict['matches'][0]
+    logger.info(f"First result type: {type(first_result)}")
+    logger.info(f"First result: {first_result}")
+    logger.info(f"First result metadata: {first_result['metadata']}")
+    for i, match in enumerate(results):
+        metadata = match.metadata
+        text = metadata['text']
+        logger.info(f"Match {i} metadata: {metadata}")
+        logger.info(f"Match {i} metadata type: {type(metadata)}")
+        logger.info(f"Match {i} - Extracted text length: {len(text)}")
+        logger.info(f"Match {i} - Adding text to context (first 100 chars): {text[:100]}...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="retrieve_context logging overhead benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=300)
+    parser.add_argument("-k", "--top-k", type=int, default=50)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    rag = make_rag(top_k=args.top_k)
+    query = "Can I return a clearance item without a receipt?"
+    embedding = rag._get_query_embedding(query)
+    response = rag.index.query(top_k=args.top_k)
+    
+    def current():
+        rag.retrieve_context(query)
+    
+    def with_legacy_logging():
+        rag.retrieve_context(query)
+        legacy_logging(query, embedding, response, response.matches)
+    
+    for label, fn in (("current (RAG_TRACE off)", current), ("plus legacy INFO logging", with_legacy_logging)):
+        fn()
+        FakeQueryResponse.str_calls = 0
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        elapsed = (time.perf_counter() - start) / args.iterations * 1000
+        print(f"{label:<26} {elapsed:8.3f}ms/query  response stringified {FakeQueryResponse.str_calls} times")
+
+
+if __name__ == "__main__":
+    main()
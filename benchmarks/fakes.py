@@ -0,0 +1,129 @@
+"""In-process fakes for Pinecone and OpenAI embeddings used by the benchmarks."""
+
+import os
+import random
+from types import SimpleNamespace
+
+# Benchmarks never reach the real services; satisfy the required settings.
+for _name in (
+    "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_INDEX", "PINECONE_RETAIL_INDEX",
+    "PINECONE_FITNESS_INDEX", "RAGMETRICS_API_KEY", "RAGMETRICS_EVAL_GROUP_ID",
+    "RAGMETRICS_RETAIL_EVAL_GROUP_ID", "RAGMETRICS_CONVERSATION_ID"
+):
+    os.environ.setdefault(_name, "benchmark")
+
+DIMENSION = 1536
+
+
+class FakeMatch:
+    """Mimics pinecone's ScoredVector (attribute access, to_dict())."""
+
+    def __init__(self, id: str, score: float, metadata: dict):
+        self.id = id
+        self.score = score
+        self.metadata = metadata
+        self.values = []
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "score": self.score, "values": list(self.values), "metadata": dict(self.metadata)}
+
+    def __repr__(self) -> str:
+        return f"{{'id': {self.id!r}, 'score': {self.score}, 'metadata': {self.metadata!r}}}"
+
+
+class FakeQueryResponse:
+    """Mimics pinecone's QueryResponse; counts how often it is stringified."""
+
+    str_calls = 0
+
+    def __init__(self, matches: list, namespace: str = ""):
+        self.matches = matches
+        self.namespace = namespace
+
+    def to_dict(self) -> dict:
+        return {"matches": [m.to_dict() for m in self.matches], "namespace": self.namespace}
+
+    def __repr__(self) -> str:
+        FakeQueryResponse.str_calls += 1
+        return repr(self.to_dict())
+
+    __str__ = __repr__
+
+
+def make_chunks(count: int, chunk_size: int = 1000, seed: int = 7) -> list:
+    """Generate `count` pseudo-text chunks of roughly `chunk_size` characters."""
+    rng = random.Random(seed)
+    words = (
+        "return refund policy receipt days store credit exchange item customer "
+        "restocking fee shipping order manager approval warranty damaged original "
+        "packaging purchase price card payment online in-store clearance final sale"
+    ).split()
+    chunks = []
+    for _ in range(count):
+        text = []
+        while sum(len(w) + 1 for w in text) < chunk_size:
+            text.append(rng.choice(words))
+        chunks.append(" ".join(text))
+    return chunks
+
+
+class FakeIndex:
+    """Pinecone Index stand-in returning `top_k` matches over a fixed chunk list."""
+
+    def __init__(self, chunks: list, source: str = "RetailPolicy.pdf"):
+        self.chunks = chunks
+        self.source = source
+        self.queries = 0
+
+    def query(self, vector=None, top_k: int = 5, include_metadata: bool = True, namespace: str = "", **kwargs):
+        self.queries += 1
+        matches = [
+            FakeMatch(
+                id=f"retail-policy-{i}",
+                score=1.0 - i * 0.01,
+                metadata={"text": self.chunks[i % len(self.chunks)], "source": self.source, "chunk_index": i}
+            )
+            for i in range(top_k)
+        ]
+        return FakeQueryResponse(matches, namespace)
+
+    def describe_index_stats(self):
+        return {"dimension": DIMENSION, "namespaces": {"": {"vector_count": len(self.chunks)}}}
+
+
+class FakeEmbeddings:
+    """OpenAI embeddings resource stand-in."""
+
+    def __init__(self, dimension: int = DIMENSION):
+        self.dimension = dimension
+        self.calls = 0
+
+    def create(self, model: str, input, dimensions: int = None, **kwargs):
+        self.calls += 1
+        inputs = input if isinstance(input, list) else [input]
+        data = []
+        for n, text in enumerate(inputs):
+            rng = random.Random(text)
+            data.append(SimpleNamespace(index=n, embedding=[rng.uniform(-1, 1) for _ in range(dimensions or self.dimension)]))
+        return SimpleNamespace(data=data)
+
+
+def make_rag(index=None, top_k: int = 5, embedding_cache=None, retrieval_cache=None):
+    """
+    Build a PineconeRAG wired to fakes (the constructor itself does no network I/O).
+
+    Args:
+        index: Index stand-in (defaults to FakeIndex over 100 chunks)
+        top_k: Number of matches per query
+        embedding_cache: Optional EmbeddingCache
+        retrieval_cache: Optional RetrievalCache
+    """
+    from src.pinecone_rag import PineconeRAG
+    rag = PineconeRAG(index_name="benchmark-index")
+    rag.index = index or FakeIndex(make_chunks(100))
+    rag.metadata = {"dimension": DIMENSION, "namespaces": {"": len(getattr(rag.index, "chunks", []))}}
+    rag.top_k = top_k
+    rag.embedding_client = SimpleNamespace(embeddings=FakeEmbeddings())
+    rag.embedding_cache = embedding_cache
+    rag.retrieval_cache = retrieval_cache
+    return rag
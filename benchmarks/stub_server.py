@@ -0,0 +1,76 @@
+"""Minimal local HTTP stub server for benchmarks."""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+# A route receives the decoded JSON body and returns (status_code, json_body)
+Route = Callable[[dict], Tuple[int, dict]]
+
+
+class StubServer:
+    """Threaded HTTP/1.1 server with keep-alive support, serving JSON routes."""
+    
+    def __init__(self, routes: Dict[str, Route], latency: float = 0.0):
+        """
+        Initialize the stub server.
+        
+        Args:
+            routes: Mapping of URL path to route handler
+            latency: Artificial server-side delay per request in seconds
+        """
+        self.routes = routes
+        self.latency = latency
+        self.connections = 0
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server.connections += 1
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                route = server.routes.get(self.path.split("?")[0])
+                if route is None:
+                    status, body = 404, {"error": "not found"}
+                else:
+                    if server.latency:
+                        threading.Event().wait(server.latency)
+                    status, body = route(json.loads(raw) if raw else {})
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            do_GET = _dispatch
+            do_POST = _dispatch
+        
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
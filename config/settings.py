@@ -12,6 +12,11 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-3.5-turbo", alias="OPEN_AI_MODEL")
+    openai_max_connections: int = Field(default=20, alias="OPENAI_MAX_CONNECTIONS")
+    openai_max_keepalive_connections: int = Field(default=10, alias="OPENAI_MAX_KEEPALIVE_CONNECTIONS")
+    openai_keepalive_expiry: float = Field(default=30.0, alias="OPENAI_KEEPALIVE_EXPIRY")
+    openai_max_concurrency: int = Field(default=16, alias="OPENAI_MAX_CONCURRENCY")
+    openai_timeout: float = Field(default=60.0, alias="OPENAI_TIMEOUT")
     
     # Pinecone Configuration
     pinecone_api_key: str = Field(..., alias="PINECONE_API_KEY")
@@ -38,11 +43,68 @@ class Settings(BaseSettings):
     ragmetrics_fitness_eval_group_id: Optional[str] = Field(default=None, alias="RAGMETRICS_FITNESS_EVAL_GROUP_ID")
     ragmetrics_type: str = Field(default="S", alias="RAGMETRICS_EVAL_TYPE")
     ragmetrics_conversation_id: str = Field(..., alias="RAGMETRICS_CONVERSATION_ID")
+    ragmetrics_connect_timeout: float = Field(default=5.0, alias="RAGMETRICS_CONNECT_TIMEOUT")
+    ragmetrics_read_timeout: float = Field(default=30.0, alias="RAGMETRICS_READ_TIMEOUT")
+    ragmetrics_max_retries: int = Field(default=3, alias="RAGMETRICS_MAX_RETRIES")
+    ragmetrics_backoff: float = Field(default=0.5, alias="RAGMETRICS_BACKOFF")
+    ragmetrics_backoff_max: float = Field(default=8.0, alias="RAGMETRICS_BACKOFF_MAX")
+    ragmetrics_pool_size: int = Field(default=10, alias="RAGMETRICS_POOL_SIZE")
     
     # RAG Configuration
     rag_top_k: int = Field(default=5, alias="RAG_TOP_K")
+    rag_query_workers: int = Field(default=8, alias="RAG_QUERY_WORKERS")
+    
+    # Adaptive Retrieval Configuration (opt-in: cut matches below RAG_MIN_SCORE or at a score drop of RAG_SCORE_GAP; 0 disables)
+    # Per-bot values are overrides only (None falls back to the global setting)
+    rag_min_score: float = Field(default=0.0, alias="RAG_MIN_SCORE")
+    rag_score_gap: float = Field(default=0.0, alias="RAG_SCORE_GAP")
+    rag_retail_min_score: Optional[float] = Field(default=None, alias="RAG_RETAIL_MIN_SCORE")
+    rag_retail_score_gap: Optional[float] = Field(default=None, alias="RAG_RETAIL_SCORE_GAP")
+    rag_fitness_min_score: Optional[float] = Field(default=None, alias="RAG_FITNESS_MIN_SCORE")
+    rag_fitness_score_gap: Optional[float] = Field(default=None, alias="RAG_FITNESS_SCORE_GAP")
     embedding_model: str = Field(default="text-embedding-3-small", alias="EMBEDDING_MODEL")
     
+    # Vector Backend Configuration ("pinecone" or "local" for the in-process NumPy index)
+    rag_backend: str = Field(default="pinecone", alias="RAG_BACKEND")
+    local_index_dir: str = Field(default="local_indexes", alias="LOCAL_INDEX_DIR")
+    local_index_dtype: str = Field(default="float32", alias="LOCAL_INDEX_DTYPE")
+    
+    # Context Packing Configuration (token budget for retrieved context; 0 disables the limit)
+    context_token_budget: int = Field(default=2000, alias="CONTEXT_TOKEN_BUDGET")
+    merge_adjacent_chunks: bool = Field(default=True, alias="MERGE_ADJACENT_CHUNKS")
+    
+    # Hybrid Retrieval Configuration (BM25 over uploaded chunks fused with dense matches)
+    hybrid_search: bool = Field(default=False, alias="HYBRID_SEARCH")
+    hybrid_candidates: int = Field(default=20, alias="HYBRID_CANDIDATES")
+    rrf_k: int = Field(default=60, alias="RRF_K")
+    
+    # Local ANN Configuration (IVF lists, optional PQ; NPROBE and RERANK trade recall for latency)
+    local_ann: bool = Field(default=False, alias="LOCAL_ANN")
+    ann_nlist: int = Field(default=0, alias="ANN_NLIST")
+    ann_pq_m: int = Field(default=0, alias="ANN_PQ_M")
+    ann_nprobe: int = Field(default=8, alias="ANN_NPROBE")
+    ann_rerank: int = Field(default=100, alias="ANN_RERANK")
+    
+    # Embedding Cache Configuration (size 0 disables the cache)
+    embedding_cache_size: int = Field(default=1024, alias="EMBEDDING_CACHE_SIZE")
+    embedding_cache_ttl: float = Field(default=86400, alias="EMBEDDING_CACHE_TTL")
+    embedding_cache_path: Optional[str] = Field(default=None, alias="EMBEDDING_CACHE_PATH")
+    
+    # Answer Cache Configuration (off by default; size 0 disables the cache)
+    answer_cache_size: int = Field(default=0, alias="ANSWER_CACHE_SIZE")
+    answer_cache_ttl: float = Field(default=3600, alias="ANSWER_CACHE_TTL")
+    
+    # Retrieval Cache Configuration (size 0 disables the cache)
+    retrieval_cache_size: int = Field(default=256, alias="RETRIEVAL_CACHE_SIZE")
+    retrieval_cache_ttl: float = Field(default=3600, alias="RETRIEVAL_CACHE_TTL")
+    rag_cache_dir: str = Field(default=".cache", alias="RAG_CACHE_DIR")
+    index_snapshot_ttl: float = Field(default=3600, alias="INDEX_SNAPSHOT_TTL")
+    
+    # Retrieval Tracing Configuration (off by default; emits DEBUG events on the "rag.trace" logger)
+    rag_trace: bool = Field(default=False, alias="RAG_TRACE")
+    rag_trace_sample_rate: float = Field(default=1.0, alias="RAG_TRACE_SAMPLE_RATE")
+    rag_trace_max_chars: int = Field(default=2000, alias="RAG_TRACE_MAX_CHARS")
+    
     # Regeneration Configuration
     reg_score: int = Field(default=3, alias="REG_SCORE")
     
@@ -2,9 +2,9 @@
 
 import logging
 import time
-from typing import Optional
-from src.openai_client import OpenAIClient
-from src.pinecone_rag import PineconeRAG
+from typing import Callable, Dict, Optional
+from config.settings import settings
+from src.clients import get_chat_client, get_pinecone_rag
 from fast_evaluation_client import FastEvaluationClient
 
 logger = logging.getLogger(__name__)
@@ -13,25 +13,43 @@ logger = logging.getLogger(__name__)
 class FastChatEngine:
     """Fast chat engine that orchestrates RAG, OpenAI, and completion API evaluation."""
     
-    def __init__(self, base_url: str, criteria_prompt: str):
+    def __init__(
+        self,
+        base_url: str,
+        criteria_prompt: str,
+        extra_criteria: Optional[Dict[str, str]] = None,
+        criteria_name: str = "Contextual_Hallucination",
+        single_pass: bool = False
+    ):
         """
         Initialize the fast chat engine.
         
         Args:
             base_url: Base URL for the completion API
-            criteria_prompt: The criteria definition to use for evaluation
+            criteria_prompt: The criteria definition to use for evaluation (drives regeneration)
+            extra_criteria: Optional further criteria (name -> definition) judged concurrently
+                with the main one and reported alongside it
+            criteria_name: Name of the main criteria
+            single_pass: Judge all criteria in one completion (see evaluate_combined)
+                instead of one concurrent completion per criteria
         """
         try:
-            self.openai_client = OpenAIClient()
-            self.pinecone_rag = PineconeRAG()
+            self.openai_client = get_chat_client()
+            # Same constitution index and host as ChatEngine, so both share one registry entry
+            self.pinecone_rag = get_pinecone_rag(index_name=settings.pinecone_index_name, host=settings.pinecone_host)
             self.evaluation_client = FastEvaluationClient(base_url)
+            # Open the judge connections now rather than on the first question
+            self.evaluation_client.warm_up()
             self.criteria_prompt = criteria_prompt
+            self.criteria_name = criteria_name
+            self.extra_criteria = extra_criteria or {}
+            self.single_pass = single_pass
             logger.info("Fast chat engine initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing fast chat engine: {str(e)}")
             raise
     
-    def process_question(self, question: str) -> dict:
+    def process_question(self, question: str, on_token: Optional[Callable[[str], None]] = None) -> dict:
         """
         Process a question through the full pipeline:
         1. Retrieve context from Pinecone RAG
@@ -40,6 +58,8 @@ class FastChatEngine:
         
         Args:
             question: The user's question
+            on_token: Optional callback; when given, the answer is streamed and
+                each piece of text is passed to it as it arrives
             
         Returns:
             Dictionary containing:
@@ -47,6 +67,8 @@ class FastChatEngine:
                 - answer: The generated answer
                 - context: The retrieved context
                 - evaluation_result: Dictionary with evaluation score or None if failed
+                  (with extra criteria also 'criteria', 'wall_time' and 'summed_time', see evaluate_many
+                  and evaluate_combined)
                 - evaluation_time: Time taken for evaluation in seconds
         """
         logger.info(f"Processing question: {question}")
@@ -63,7 +85,14 @@ class FastChatEngine:
         
         # Step 2: Generate answer using OpenAI
         try:
-            answer = self.openai_client.generate_answer(question, context)
+            if on_token is None:
+                answer = self.openai_client.generate_answer(question, context)
+            else:
+                pieces = []
+                for piece in self.openai_client.stream_answer(question, context):
+                    pieces.append(piece)
+                    on_token(piece)
+                answer = "".join(pieces).strip()
             logger.info(f"Generated answer ({len(answer)} characters)")
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}")
@@ -75,13 +104,27 @@ class FastChatEngine:
         evaluation_time = None
         try:
             start_time = time.time()
-            evaluation_result = self.evaluation_client.evaluate_answer(
-                question=question,
-                answer=answer,
-                context=context,
-                ground_truth="",  # Empty string as per requirements
-                criteria_prompt=self.criteria_prompt
-            )
+            if self.extra_criteria:
+                # All criteria at once; the main criteria's score stays under 'score' for regeneration
+                evaluate = self.evaluation_client.evaluate_combined if self.single_pass else self.evaluation_client.evaluate_many
+                evaluation_result = evaluate(
+                    question=question,
+                    answer=answer,
+                    context=context,
+                    ground_truth="",  # Empty string as per requirements
+                    criteria={self.criteria_name: self.criteria_prompt, **self.extra_criteria}
+                )
+                for criterion in (evaluation_result or {}).get('criteria', []):
+                    if criterion['criteria'] == self.criteria_name:
+                        evaluation_result['score'] = criterion['score']
+            else:
+                evaluation_result = self.evaluation_client.evaluate_answer(
+                    question=question,
+                    answer=answer,
+                    context=context,
+                    ground_truth="",  # Empty string as per requirements
+                    criteria_prompt=self.criteria_prompt
+                )
             evaluation_time = time.time() - start_time
         except Exception as e:
             logger.error(f"Error sending to completion API: {str(e)}")
@@ -2,25 +2,57 @@
 
 import logging
 import json
+import time
 import requests
-from typing import Optional, Dict
-from prompt import PROMPT_RATE_ANSWER_SCORE_ONLY, JSON_SCORE_GRAMMAR_SCORE_ONLY, MAX_TOKENS, TEMPERATURE, TOP_P, TOP_K, REPEAT_PENALTY, STOP_SEQUENCE
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Optional, Dict
+from prompt import PROMPT_RATE_ANSWER_SCORE_ONLY_PREFIX, PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX, JSON_SCORE_GRAMMAR_SCORE_ONLY, build_multi_criteria_prefix, build_multi_score_grammar, MAX_TOKENS, TEMPERATURE, TOP_P, TOP_K, REPEAT_PENALTY, STOP_SEQUENCE
 
 logger = logging.getLogger(__name__)
 
+# Pool size used until the judge server reports its slot count
+DEFAULT_POOL_SIZE = 4
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+
 
 class FastEvaluationClient:
     """Client for evaluating answers using the completion API."""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool_size: Optional[int] = None, pin_slots: bool = False):
         """
         Initialize the fast evaluation client.
         
+        Requests go through one persistent requests.Session, so judge calls
+        reuse open keep-alive connections instead of reconnecting each time.
+        Call warm_up() at startup to size the pool to the server's slot count
+        and open the connections before the first evaluation.
+        
+        Judge prompts start with a byte-identical prefix per criteria, sent
+        with cache_prompt so the server reuses its KV cache for it. By
+        default the server picks the slot (llama.cpp prefers the idle slot
+        holding the most similar prompt). pin_slots keeps each criteria on
+        one fixed slot (id_slot) once warm_up() has read the slot count; that
+        trades parallelism for cache hits, since every call for a criteria,
+        from every engine in the process, then queues on that slot. Only
+        enable it for a single-user judge server.
+        
         Args:
             base_url: Base URL for the completion API (e.g., http://10.10.10.10:8080)
+            pool_size: Optional connection pool size (defaults to the server's slot count after warm_up)
+            pin_slots: Pin each criteria prefix to one server slot (off by default)
         """
         self.base_url = base_url.rstrip('/')
         self.completion_url = f"{self.base_url}/completion"
+        self.fixed_pool_size = pool_size is not None
+        self.session = requests.Session()
+        self._mount(pool_size or DEFAULT_POOL_SIZE)
+        self.pin_slots = pin_slots
+        self.slot_count: Optional[int] = None
+        self._prefixes: Dict[Any, str] = {}
+        self._grammars: Dict[tuple, str] = {}
+        self._slots: Dict[Any, int] = {}
         logger.info(f"FastEvaluationClient initialized with base_url: {self.base_url}")
         logger.info(f"Completion URL: {self.completion_url}")
     
@@ -46,9 +78,8 @@ class FastEvaluationClient:
             Dictionary with 'score' (int) or None if evaluation failed
         """
         try:
-            # Generate prompt using prompt.py
-            prompt = PROMPT_RATE_ANSWER_SCORE_ONLY.format(
-                criteria_prompt=criteria_prompt,
+            # Generate prompt using prompt.py: cached constant prefix + per-call suffix
+            prompt = self._prompt_prefix(criteria_prompt) + PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX.format(
                 question=question,
                 candidate_answer=answer,
                 ground_truth=ground_truth,
@@ -56,26 +87,16 @@ class FastEvaluationClient:
             )
             
             # Prepare API request payload
-            payload = {
-                "prompt": prompt,
-                "n_predict": MAX_TOKENS,
-                "temperature": TEMPERATURE,
-                "top_p": TOP_P,
-                "top_k": TOP_K,
-                "repeat_penalty": REPEAT_PENALTY,
-                "max_tokens": MAX_TOKENS,
-                "grammar": JSON_SCORE_GRAMMAR_SCORE_ONLY,
-                "stop": STOP_SEQUENCE
-            }
+            payload = self._payload(prompt, JSON_SCORE_GRAMMAR_SCORE_ONLY, criteria_prompt)
             
             logger.info(f"Sending evaluation request to {self.completion_url}")
             logger.debug(f"Payload keys: {list(payload.keys())}")
             
-            # Make API request
-            response = requests.post(
+            # Make API request on the pooled keep-alive session
+            response = self.session.post(
                 self.completion_url,
                 json=payload,
-                timeout=60  # 60 second timeout
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
             )
             response.raise_for_status()
             
@@ -102,10 +123,15 @@ class FastEvaluationClient:
                 # Convert to int
                 score_int = int(score)
                 
+                timings = self._extract_timings(response_data)
                 logger.info(f"Evaluation successful: score={score_int}")
-                return {
+                self._log_timings(timings)
+                result = {
                     'score': score_int
                 }
+                if timings:
+                    result['timings'] = timings
+                return result
                 
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse JSON from content: {content}")
@@ -121,6 +147,313 @@ class FastEvaluationClient:
         except Exception as e:
             logger.error(f"Unexpected error in evaluation: {str(e)}")
             return None
-
-
-
+    
+    def _mount(self, pool_size: int) -> None:
+        """Mount a connection pool of the given size on the session (closing the previous one)."""
+        previous = self.session.adapters.get("http://")
+        self.pool_size = pool_size
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if isinstance(previous, HTTPAdapter) and previous is not adapter:
+            previous.close()
+    
+    def evaluate_many(
+        self,
+        question: str,
+        answer: str,
+        context: str,
+        ground_truth: str,
+        criteria: Dict[str, str],
+        max_in_flight: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Evaluate an answer against several criteria concurrently.
+        
+        Every criteria is a separate judge call with its own cacheable prompt
+        prefix (cache_prompt); the server picks the slot holding it, or the
+        criteria's fixed slot when pin_slots is on. The calls are submitted
+        together, at most max_in_flight at a time, so the wall time approaches that
+        of the slowest criteria instead of the sum of all of them.
+        
+        Args:
+            question: The user's question
+            answer: The candidate answer to evaluate
+            context: The context retrieved from RAG
+            ground_truth: The ground truth answer (empty string in this case)
+            criteria: Criteria name -> criteria definition, in report order
+            max_in_flight: Maximum concurrent judge calls (defaults to the server
+                slot count, or the pool size if unknown)
+            
+        Returns:
+            Dictionary with 'criteria' (list of {'criteria': name, 'score': int, 'time': seconds}
+            in the order given, failed criteria omitted), 'wall_time' and 'summed_time'
+            in seconds, or None if every criteria failed
+        """
+        if not criteria:
+            return None
+        max_in_flight = max_in_flight or self.slot_count or self.pool_size
+        
+        def evaluate(item: tuple) -> tuple:
+            name, criteria_prompt = item
+            start = time.perf_counter()
+            result = self.evaluate_answer(question, answer, context, ground_truth, criteria_prompt)
+            return name, result, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(criteria))) as executor:
+            outcomes = list(executor.map(evaluate, criteria.items()))
+        wall_time = time.perf_counter() - start
+        
+        results = []
+        for name, result, elapsed in outcomes:
+            if result is None:
+                logger.warning(f"Evaluation failed for criteria '{name}'")
+                continue
+            entry = {'criteria': name, 'score': result['score'], 'time': elapsed}
+            if 'timings' in result:
+                entry['timings'] = result['timings']
+            results.append(entry)
+        if not results:
+            return None
+        
+        summed_time = sum(elapsed for _, _, elapsed in outcomes)
+        logger.info(
+            f"Evaluated {len(results)}/{len(criteria)} criteria in {wall_time:.3f}s wall "
+            f"({summed_time:.3f}s summed, max_in_flight={max_in_flight})"
+        )
+        return {
+            'criteria': results,
+            'wall_time': wall_time,
+            'summed_time': summed_time
+        }
+    
+    def evaluate_combined(
+        self,
+        question: str,
+        answer: str,
+        context: str,
+        ground_truth: str,
+        criteria: Dict[str, str]
+    ) -> Optional[Dict]:
+        """
+        Evaluate an answer against several criteria in a single judge call.
+        
+        All criteria definitions go into one prompt and a generated grammar
+        forces {"<name>": 1-5, ...} with every criteria, so the question,
+        answer and context are prefilled once instead of once per criteria.
+        
+        Args:
+            question: The user's question
+            answer: The candidate answer to evaluate
+            context: The context retrieved from RAG
+            ground_truth: The ground truth answer (empty string in this case)
+            criteria: Criteria name -> criteria definition, in report order
+            
+        Returns:
+            Dictionary in the evaluate_many shape ('criteria', 'wall_time',
+            'summed_time', plus 'timings' when the server reports them),
+            or None if evaluation failed
+        """
+        if not criteria:
+            return None
+        key = tuple(criteria.items())
+        try:
+            prefix = self._prefixes.get(key)
+            if prefix is None:
+                prefix = self._prefixes.setdefault(key, build_multi_criteria_prefix(criteria))
+            grammar = self._grammars.get(key)
+            if grammar is None:
+                grammar = self._grammars.setdefault(key, build_multi_score_grammar(list(criteria)))
+            prompt = prefix + PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX.format(
+                question=question,
+                candidate_answer=answer,
+                ground_truth=ground_truth,
+                context=context
+            )
+            payload = self._payload(prompt, grammar, key)
+            # One score per criteria needs more room than the single-score default
+            payload["n_predict"] = payload["max_tokens"] = max(MAX_TOKENS, 16 * len(criteria))
+            
+            start = time.perf_counter()
+            response = self.session.post(
+                self.completion_url,
+                json=payload,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+            )
+            response.raise_for_status()
+            response_data = response.json()
+            elapsed = time.perf_counter() - start
+            
+            content = response_data.get('content', '')
+            scores = json.loads(content) if content else {}
+            results = []
+            for name in criteria:
+                if name not in scores:
+                    logger.warning(f"No score for criteria '{name}' in combined evaluation")
+                    continue
+                results.append({'criteria': name, 'score': int(scores[name]), 'time': elapsed})
+            if not results:
+                logger.error(f"No criteria scores in combined evaluation response: {content}")
+                return None
+            
+            timings = self._extract_timings(response_data)
+            logger.info(f"Combined evaluation of {len(results)}/{len(criteria)} criteria in {elapsed:.3f}s")
+            self._log_timings(timings)
+            result = {
+                'criteria': results,
+                'wall_time': elapsed,
+                'summed_time': elapsed
+            }
+            if timings:
+                result['timings'] = timings
+            return result
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error making API request: {str(e)}")
+            return None
+        except (ValueError, TypeError) as e:
+            # json.JSONDecodeError is a ValueError
+            logger.error(f"Failed to parse combined evaluation response: {str(e)}")
+            return None
+    
+    def _payload(self, prompt: str, grammar: str, slot_key: Any) -> Dict[str, Any]:
+        """
+        Build a /completion payload.
+        
+        Args:
+            prompt: Full judge prompt
+            grammar: GBNF grammar constraining the output
+            slot_key: Key of the constant prompt prefix (used to pin a server slot)
+            
+        Returns:
+            Request payload
+        """
+        payload = {
+            "prompt": prompt,
+            "n_predict": MAX_TOKENS,
+            "temperature": TEMPERATURE,
+            "top_p": TOP_P,
+            "top_k": TOP_K,
+            "repeat_penalty": REPEAT_PENALTY,
+            "max_tokens": MAX_TOKENS,
+            "grammar": grammar,
+            "stop": STOP_SEQUENCE,
+            # Reuse the KV cache of the shared prefix from the previous call on the slot
+            "cache_prompt": True
+        }
+        slot = self._slot_for(slot_key)
+        if slot is not None:
+            payload["id_slot"] = slot
+        return payload
+    
+    @staticmethod
+    def _log_timings(timings: Optional[Dict[str, Any]]) -> None:
+        """Log prompt-eval vs generation timings of a judge call."""
+        if timings:
+            logger.info(
+                f"Judge timings: prompt eval {timings['prompt_tokens']} tokens in {timings['prompt_ms']:.1f}ms "
+                f"({timings['cached_tokens']} cached), generation {timings['generated_tokens']} tokens "
+                f"in {timings['generation_ms']:.1f}ms"
+            )
+    
+    def _prompt_prefix(self, criteria_prompt: str) -> str:
+        """Formatted prompt prefix for a criteria (built once, so it is byte-identical across calls)."""
+        prefix = self._prefixes.get(criteria_prompt)
+        if prefix is None:
+            prefix = PROMPT_RATE_ANSWER_SCORE_ONLY_PREFIX.format(criteria_prompt=criteria_prompt)
+            self._prefixes[criteria_prompt] = prefix
+        return prefix
+    
+    def _slot_for(self, prefix_key: Any) -> Optional[int]:
+        """
+        Server slot pinned to a prompt prefix (round-robin over the slots).
+        
+        Returns:
+            Slot id, or None to let the server choose (pinning off or slot count unknown)
+        """
+        if not self.pin_slots or not self.slot_count:
+            return None
+        slot = self._slots.get(prefix_key)
+        if slot is None:
+            slot = self._slots.setdefault(prefix_key, len(self._slots) % self.slot_count)
+        return slot
+    
+    @staticmethod
+    def _extract_timings(response_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Prompt-eval vs generation timings from a completion response.
+        
+        Args:
+            response_data: Parsed /completion response (llama.cpp style 'timings' and 'tokens_cached')
+            
+        Returns:
+            Dictionary with 'prompt_tokens' (evaluated, i.e. not served from the cache),
+            'prompt_ms', 'cached_tokens', 'generated_tokens' and 'generation_ms',
+            or None if the server sent no timings
+        """
+        timings = response_data.get('timings')
+        if not isinstance(timings, dict):
+            return None
+        prompt_tokens = int(timings.get('prompt_n') or 0)
+        # Newer servers report the reused prompt tokens as timings.cache_n, older ones as tokens_cached
+        cached_tokens = timings.get('cache_n')
+        if cached_tokens is None:
+            cached_tokens = response_data.get('tokens_cached', 0)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'prompt_ms': float(timings.get('prompt_ms') or 0.0),
+            'cached_tokens': int(cached_tokens or 0),
+            'generated_tokens': int(timings.get('predicted_n') or 0),
+            'generation_ms': float(timings.get('predicted_ms') or 0.0)
+        }
+    
+    def server_slots(self) -> Optional[int]:
+        """
+        Ask the judge server how many requests it processes in parallel.
+        
+        Returns:
+            Slot count from /props ('total_slots') or /slots, or None if unavailable
+        """
+        try:
+            response = self.session.get(f"{self.base_url}/props", timeout=(CONNECT_TIMEOUT, 5))
+            if response.ok:
+                slots = response.json().get('total_slots')
+                if slots:
+                    return int(slots)
+            response = self.session.get(f"{self.base_url}/slots", timeout=(CONNECT_TIMEOUT, 5))
+            if response.ok and isinstance(response.json(), list):
+                return len(response.json()) or None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.debug(f"Could not read judge slot count: {str(e)}")
+        return None
+    
+    def warm_up(self) -> int:
+        """
+        Size the pool to the server's slot count and open its connections.
+        
+        One concurrent /health request per pool slot establishes the
+        keep-alive connections, so the first evaluations do not pay for the
+        TCP handshake. Failures are logged, never raised.
+        
+        Returns:
+            Number of warm-up requests that reached the server
+        """
+        slots = self.server_slots()
+        self.slot_count = slots
+        if slots and not self.fixed_pool_size and slots != self.pool_size:
+            self._mount(slots)
+        
+        def ping(_: int) -> bool:
+            try:
+                # Any response (503 while the model loads included) leaves an open connection
+                self.session.get(f"{self.base_url}/health", timeout=(CONNECT_TIMEOUT, 5))
+                return True
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"Judge warm-up request failed: {str(e)}")
+                return False
+        
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            warmed = sum(executor.map(ping, range(self.pool_size)))
+        logger.info(f"Warmed {warmed}/{self.pool_size} judge connections to {self.base_url}")
+        return warmed
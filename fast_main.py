@@ -4,7 +4,7 @@ import sys
 import argparse
 import logging
 import time
-from src.utils import setup_logging
+from src.utils import setup_logging, AnswerPrinter, print_usage_stats
 from fast_chat_engine import FastChatEngine
 from fast_utils import get_criteria_from_csv, append_log_row, log_timestamp_utc, LOGS_FAST_CSV
 
@@ -23,6 +23,11 @@ def main():
                         help='Base URL for the completion API (e.g., http://10.10.10.10:8080)')
     parser.add_argument('-nl', '--no-logs', dest='no_logs', action='store_true',
                         help='Do not log Q&A to logs_fast.csv (logging is on by default)')
+    parser.add_argument('-c', '--criteria', dest='extra_criteria', nargs='+', default=[],
+                        help='Extra criteria from criteria.csv judged concurrently with Contextual_Hallucination '
+                             '(e.g. -c Accuracy Succinctness Hallucination_Score)')
+    parser.add_argument('-sp', '--single-pass', dest='single_pass', action='store_true',
+                        help='With -c, score all criteria in one judge completion instead of one per criteria')
     args = parser.parse_args()
     logs_enabled = not args.no_logs
     
@@ -33,10 +38,21 @@ def main():
         print("\n[ERROR] Failed to load criteria from criteria.csv")
         sys.exit(1)
     
+    extra_criteria = {}
+    for name in args.extra_criteria:
+        prompt = get_criteria_from_csv('criteria.csv', name)
+        if not prompt:
+            print(f"\n[ERROR] Failed to load criteria '{name}' from criteria.csv")
+            sys.exit(1)
+        extra_criteria[name] = prompt
+    
     print("=" * 60)
     print("Fast Chat Test Project - RAG-based Chat Engine")
     print("=" * 60)
     print(f"Completion API: {args.base_url}")
+    if extra_criteria:
+        mode = "single pass" if args.single_pass else "concurrent"
+        print(f"Criteria ({mode}): {', '.join([CRITERIA_NAME, *extra_criteria])}")
     if logs_enabled:
         print(f"Logging enabled: writing to {LOGS_FAST_CSV}")
     else:
@@ -48,7 +64,13 @@ def main():
     try:
         # Initialize chat engine
         print("Initializing chat engine...")
-        engine = FastChatEngine(base_url=args.base_url, criteria_prompt=criteria_prompt)
+        engine = FastChatEngine(
+            base_url=args.base_url,
+            criteria_prompt=criteria_prompt,
+            extra_criteria=extra_criteria,
+            criteria_name=CRITERIA_NAME,
+            single_pass=args.single_pass
+        )
         print("Chat engine ready!\n")
         
         # Interactive chat loop
@@ -60,6 +82,7 @@ def main():
                 # Check for exit commands
                 if question.lower() in ['quit', 'exit', 'q']:
                     print("\nGoodbye!")
+                    print_usage_stats(engine)
                     break
                 
                 if not question:
@@ -71,17 +94,25 @@ def main():
                 
                 # Process the question
                 print("\nProcessing...", end='', flush=True)
-                result = engine.process_question(question)
                 
-                # Step 1 & 2: Show bot's answer first (replace "Processing..." line)
-                print("\r" + " " * 60 + "\r" + "-" * 60)
-                print("Bot:", result['answer'])
-                print("-" * 60)
+                # Step 1 & 2: Stream bot's answer as it is generated (replaces "Processing..." line)
+                printer = AnswerPrinter()
+                result = engine.process_question(question, on_token=printer)
+                printer.finish(result['answer'])
                 
                 # Step 3 & 4: Show evaluation results
                 evaluation_result = result.get('evaluation_result')
                 evaluation_time = result.get('evaluation_time')
-                if evaluation_result:
+                if evaluation_result and 'criteria' in evaluation_result:
+                    print("\nEvaluation")
+                    print("-" * 60)
+                    for criterion in evaluation_result['criteria']:
+                        print(f"{criterion['criteria']} - Score: {criterion['score']} ({criterion['time']:.3f}s)")
+                    print(
+                        f"Evaluation time: {evaluation_result['wall_time']:.3f}s wall "
+                        f"vs {evaluation_result['summed_time']:.3f}s summed"
+                    )
+                elif evaluation_result:
                     score = evaluation_result.get('score')
                     if score is not None:
                         print("\nEvaluation")
@@ -89,6 +120,13 @@ def main():
                         print(f"Contextual_Hallucination - Score: {score}")
                         if evaluation_time is not None:
                             print(f"Evaluation time: {evaluation_time:.3f}s")
+                        timings = evaluation_result.get('timings')
+                        if timings:
+                            print(
+                                f"Judge prompt eval: {timings['prompt_tokens']} tokens in {timings['prompt_ms']:.1f}ms "
+                                f"({timings['cached_tokens']} cached) | "
+                                f"generation: {timings['generated_tokens']} tokens in {timings['generation_ms']:.1f}ms"
+                            )
                 
                 # Step 5: Check if regeneration is needed
                 regenerated_answer = engine.regenerate_answer_if_needed(
@@ -113,19 +151,25 @@ def main():
                 # Log to CSV by default (use -nl to disable)
                 if logs_enabled:
                     answer_to_log = regenerated_answer if regenerated_answer else result['answer']
-                    score_val = evaluation_result.get('score') if evaluation_result else None
-                    append_log_row(
-                        timestamp=log_timestamp_utc(),
-                        bot_name="fast-constitution",
-                        question=result['question'],
-                        answer=answer_to_log,
-                        context=result['context'],
-                        criteria=CRITERIA_NAME,
-                        score=score_val,
-                    )
+                    if evaluation_result and 'criteria' in evaluation_result:
+                        scores = [(c['criteria'], c['score']) for c in evaluation_result['criteria']]
+                    else:
+                        scores = [(CRITERIA_NAME, evaluation_result.get('score') if evaluation_result else None)]
+                    # One row per criteria
+                    for criteria_name, score_val in scores:
+                        append_log_row(
+                            timestamp=log_timestamp_utc(),
+                            bot_name="fast-constitution",
+                            question=result['question'],
+                            answer=answer_to_log,
+                            context=result['context'],
+                            criteria=criteria_name,
+                            score=score_val,
+                        )
                 
             except KeyboardInterrupt:
                 print("\n\nInterrupted by user. Goodbye!")
+                print_usage_stats(engine)
                 break
             except Exception as e:
                 logger.error(f"Error processing question: {str(e)}")
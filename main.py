@@ -3,7 +3,7 @@
 import sys
 import argparse
 import logging
-from src.utils import setup_logging
+from src.utils import setup_logging, AnswerPrinter, print_usage_stats
 from src.chat_engine import ChatEngine
 
 # Set logging to WARNING level to suppress INFO/DEBUG messages
@@ -46,6 +46,7 @@ def main():
                 # Check for exit commands
                 if question.lower() in ['quit', 'exit', 'q']:
                     print("\nGoodbye!")
+                    print_usage_stats(engine)
                     break
                 
                 if not question:
@@ -54,12 +55,11 @@ def main():
                 
                 # Process the question
                 print("\nProcessing...", end='', flush=True)
-                result = engine.process_question(question)
                 
-                # Step 1 & 2: Show bot's answer first (replace "Processing..." line)
-                print("\r" + " " * 60 + "\r" + "-" * 60)
-                print("Bot:", result['answer'])
-                print("-" * 60)
+                # Step 1 & 2: Stream bot's answer as it is generated (replaces "Processing..." line)
+                printer = AnswerPrinter()
+                result = engine.process_question(question, on_token=printer)
+                printer.finish(result['answer'])
                 
                 # Step 3 & 4: Show evaluation results
                 ragmetrics_result = result.get('ragmetrics_result')
@@ -131,6 +131,7 @@ def main():
                 
             except KeyboardInterrupt:
                 print("\n\nInterrupted by user. Goodbye!")
+                print_usage_stats(engine)
                 break
             except Exception as e:
                 logger.error(f"Error processing question: {str(e)}")
@@ -3,6 +3,8 @@
 Prompt template for LLM Judge API calls
 """
 
+import json
+
 #===============================================================
 # Prompt template for LLM Judge API calls with score only
 #===============================================================
@@ -35,7 +37,9 @@ ws ::= [ \t\n]*
 
 
 
-PROMPT_RATE_ANSWER_SCORE_ONLY = """
+# Split into a constant prefix (instructions + criteria) and a per-call suffix, so the
+# prefix is byte-identical across calls and the judge server can reuse its KV cache
+PROMPT_RATE_ANSWER_SCORE_ONLY_PREFIX = """
 You are an impartial grader.
 Review the candidate answer and the correct answer based on the following context as inidicated in the criteria:
 Review all the criteria scores.
@@ -58,7 +62,9 @@ Your response MUST follow this exact JSON format:
 }}
 
 Replace X with your chosen integer score from 1 to 5.
+"""
 
+PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX = """
 <Question>
 {question}
 </Question>
@@ -76,6 +82,8 @@ Replace X with your chosen integer score from 1 to 5.
 </Context>
 """
 
+PROMPT_RATE_ANSWER_SCORE_ONLY = PROMPT_RATE_ANSWER_SCORE_ONLY_PREFIX + PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX
+
 PROMPT_RATE_ANSWER = """
 You are an impartial grader.
 Review the candidate answer and the correct answer based on the following context as inidicated in the criteria:
@@ -115,3 +123,79 @@ Replace "..." with your chosen reason for the score.
 {context}
 </Context>
 """
+
+#===============================================================
+# Single-pass multi-criteria judge (one completion scores every criteria)
+#===============================================================
+
+# Same constant-prefix layout as PROMPT_RATE_ANSWER_SCORE_ONLY; followed by PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX
+PROMPT_RATE_ANSWER_MULTI_PREFIX = """
+You are an impartial grader.
+Review the candidate answer and the correct answer based on the following context as inidicated in each of the criteria below.
+Score every criteria independently, using only its own definition.
+
+{criteria_blocks}
+
+Output ONLY a valid JSON object. 
+Do not output explanations, reasoning, or commentary.
+Do not output any text before or after the JSON.
+Do not restate the task.
+Do not justify the scores.
+
+Your response MUST follow this exact JSON format, with one key per criteria in this order:
+
+{json_format}
+
+Replace each X with your chosen integer score from 1 to 5 for that criteria.
+"""
+
+PROMPT_CRITERIA_BLOCK = """<Criteria name="{criteria_name}">
+{criteria_prompt}
+</Criteria>"""
+
+
+def build_multi_criteria_prefix(criteria: dict) -> str:
+    """
+    Build the constant prompt prefix that asks for every criteria's score at once.
+    
+    Args:
+        criteria: Criteria name -> criteria definition, in output order
+        
+    Returns:
+        Prompt prefix (to be followed by PROMPT_RATE_ANSWER_SCORE_ONLY_SUFFIX)
+    """
+    criteria_blocks = "\n\n".join(
+        PROMPT_CRITERIA_BLOCK.format(criteria_name=name, criteria_prompt=prompt)
+        for name, prompt in criteria.items()
+    )
+    json_format = "{\n" + ",\n".join(f"  {json.dumps(name)}: X" for name in criteria) + "\n}"
+    return PROMPT_RATE_ANSWER_MULTI_PREFIX.format(criteria_blocks=criteria_blocks, json_format=json_format)
+
+
+def _gbnf_literal(text: str) -> str:
+    """Quote text as a GBNF string literal."""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_multi_score_grammar(criteria_names) -> str:
+    """
+    Build a GBNF grammar forcing {"<name>": 1-5, ...} with every criteria in order.
+    
+    Extends JSON_SCORE_GRAMMAR_SCORE_ONLY from a single "score" key to one
+    key per criteria, with the same number and whitespace rules.
+    
+    Args:
+        criteria_names: Criteria names, in output order
+        
+    Returns:
+        GBNF grammar string
+    """
+    members = ' ws "," ws '.join(
+        f'{_gbnf_literal(json.dumps(name))} ws ":" ws number' for name in criteria_names
+    )
+    return f'''
+root ::= json-object
+json-object ::= "{{" ws {members} ws "}}"
+number ::= [1-5]
+ws ::= [ \\t\\n]*
+'''
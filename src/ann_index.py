@@ -0,0 +1,274 @@
+"""Approximate nearest-neighbour search (IVF with optional product quantization)."""
+
+import json
+import logging
+import os
+from typing import Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block during k-means assignment (bounds temporary memory)
+ASSIGN_BLOCK_SIZE = 65536
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Return the indices of the top_k scores, highest first.
+
+    Uses ``argpartition`` (linear time) and only sorts the selected rows.
+
+    Args:
+        scores: 1-D array of scores
+        top_k: Number of rows to select
+
+    Returns:
+        Array of row indices
+    """
+    if top_k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, top_k - 1)[:top_k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, inner_product: bool) -> np.ndarray:
+    """Assign each vector to its nearest centroid (max inner product or min L2)."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    centroid_norms = None if inner_product else (centroids ** 2).sum(axis=1)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE):
+        block = vectors[start:start + ASSIGN_BLOCK_SIZE]
+        scores = block @ centroids.T
+        if inner_product:
+            labels[start:start + len(block)] = scores.argmax(axis=1)
+        else:
+            # argmin ||x - c||^2 == argmin ||c||^2 - 2 x.c
+            labels[start:start + len(block)] = (centroid_norms - 2 * scores).argmin(axis=1)
+    return labels
+
+
+def kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 10,
+    inner_product: bool = False,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Train k centroids with Lloyd's algorithm.
+
+    Args:
+        vectors: Training matrix (n, d), float32
+        k: Number of centroids (clamped to n)
+        iterations: Number of Lloyd iterations
+        inner_product: Spherical k-means (centroids re-normalized, assignment by dot product)
+        seed: Random seed for the initial centroids
+
+    Returns:
+        Centroid matrix (k, d), float32
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids, inner_product)
+        counts = np.bincount(labels, minlength=k)
+        # Per-cluster sums via one sort + reduceat (much faster than np.add.at)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.zeros_like(centroids)
+        filled = counts > 0
+        sums[filled] = np.add.reduceat(vectors[order], starts[filled], axis=0)
+        empty = counts == 0
+        # Re-seed empty clusters with random points so every list stays usable
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+            counts[empty] = 1
+        centroids = (sums / counts[:, None]).astype(np.float32)
+        if inner_product:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+    return centroids
+
+
+class IVFPQIndex:
+    """
+    Inverted-file index over one namespace of a LocalVectorIndex.
+
+    Vectors are clustered into ``nlist`` lists around k-means centroids. A
+    query scores only the rows of its ``nprobe`` nearest lists, so latency
+    grows with nprobe / nlist of the corpus instead of all of it. With
+    ``pq_m`` > 0 the rows are also product-quantized into ``pq_m`` one-byte
+    codes and scored from a per-query lookup table; the best ``rerank``
+    candidates are then rescored exactly against the full vectors.
+
+    Knobs: ``nprobe`` and ``rerank`` trade recall for latency at query time
+    and can be changed on a built index; ``nlist`` and ``pq_m`` are fixed at
+    build time. Scores are inner products, i.e. cosine similarity for the
+    normalized vectors of a cosine LocalVectorIndex.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        codebooks: Optional[np.ndarray] = None,
+        codes: Optional[np.ndarray] = None,
+        nprobe: int = 8,
+        rerank: int = 100
+    ):
+        """
+        Initialize from built arrays (use ``build()`` or ``load()``).
+
+        Args:
+            centroids: Coarse centroids (nlist, d)
+            list_offsets: Start offset of each list in list_rows (nlist + 1,)
+            list_rows: Row ids grouped by list
+            codebooks: PQ codebooks (pq_m, ksub, d / pq_m), or None without PQ
+            codes: PQ codes (n, pq_m) uint8, or None without PQ
+            nprobe: Number of lists scanned per query
+            rerank: Candidates rescored exactly after PQ scoring (0 returns PQ scores)
+        """
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.codebooks = codebooks
+        self.codes = codes
+        self.nprobe = nprobe
+        self.rerank = rerank
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def pq_m(self) -> int:
+        return 0 if self.codebooks is None else len(self.codebooks)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        nlist: int = 0,
+        pq_m: int = 0,
+        nprobe: int = 8,
+        rerank: int = 100,
+        train_size: int = 100000,
+        seed: int = 0
+    ) -> "IVFPQIndex":
+        """
+        Build an index over a vector matrix.
+
+        Args:
+            vectors: Matrix (n, d) of normalized float32 vectors
+            nlist: Number of inverted lists (0 picks 4 * sqrt(n))
+            pq_m: Number of PQ sub-quantizers (0 disables PQ; must divide d)
+            nprobe: Default number of lists scanned per query
+            rerank: Default number of PQ candidates rescored exactly
+            train_size: Maximum number of vectors sampled for k-means training
+                (further capped at 64 per centroid)
+            seed: Random seed
+
+        Returns:
+            IVFPQIndex instance
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dimension = vectors.shape
+        if n == 0:
+            raise ValueError("Cannot build an ANN index without vectors")
+        nlist = min(nlist or max(1, int(4 * np.sqrt(n))), n)
+        if pq_m and dimension % pq_m:
+            raise ValueError(f"pq_m ({pq_m}) must divide the vector dimension ({dimension})")
+
+        rng = np.random.default_rng(seed)
+        # ~64 training points per centroid is plenty for k-means (and much faster)
+        train_size = min(train_size, 64 * max(nlist, 256))
+        train = vectors if n <= train_size else vectors[rng.choice(n, size=train_size, replace=False)]
+        logger.info(f"Building IVF index: {n} vectors, nlist={nlist}, pq_m={pq_m}")
+
+        centroids = kmeans(train, nlist, inner_product=True, seed=seed)
+        labels = _assign(vectors, centroids, inner_product=True)
+        list_rows = np.argsort(labels, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=len(centroids)))]).astype(np.int64)
+
+        codebooks = codes = None
+        if pq_m:
+            dsub = dimension // pq_m
+            ksub = min(256, len(train))
+            train = train[:64 * ksub]
+            codebooks = np.empty((pq_m, ksub, dsub), dtype=np.float32)
+            codes = np.empty((n, pq_m), dtype=np.uint8)
+            for j in range(pq_m):
+                sub = slice(j * dsub, (j + 1) * dsub)
+                codebooks[j] = kmeans(np.ascontiguousarray(train[:, sub]), ksub, seed=seed + j)
+                codes[:, j] = _assign(np.ascontiguousarray(vectors[:, sub]), codebooks[j], inner_product=False)
+
+        return cls(centroids, list_offsets, list_rows, codebooks, codes, nprobe=nprobe, rerank=rerank)
+
+    def search(self, query: np.ndarray, top_k: int, vectors: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximate top_k rows for a query.
+
+        Args:
+            query: Normalized query vector (d,)
+            top_k: Number of rows to return
+            vectors: Full vector matrix, used for exact scoring (required without PQ
+                and for reranking)
+
+        Returns:
+            Tuple of (row ids, scores), highest score first
+        """
+        coarse = self.centroids @ query
+        nprobe = min(max(self.nprobe, 1), self.nlist)
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        candidates = np.concatenate(
+            [self.list_rows[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probe]
+        )
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+
+        if self.codes is None:
+            scores = vectors[candidates] @ query
+        else:
+            # Asymmetric distance: one table of sub-vector inner products per query
+            table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.pq_m, -1))
+            scores = table[np.arange(self.pq_m), self.codes[candidates]].sum(axis=1)
+            if self.rerank and vectors is not None:
+                keep = top_k_rows(scores, max(self.rerank, top_k))
+                candidates = candidates[keep]
+                scores = vectors[candidates] @ query
+
+        top = top_k_rows(scores, top_k)
+        return candidates[top], scores[top]
+
+    def save(self, path: str) -> None:
+        """Save the index to a ``.npz`` file (written atomically)."""
+        arrays = {
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "list_rows": self.list_rows,
+            "config": np.array(json.dumps({"nprobe": self.nprobe, "rerank": self.rerank}))
+        }
+        if self.codes is not None:
+            arrays["codebooks"] = self.codebooks
+            arrays["codes"] = self.codes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFPQIndex":
+        """Load an index saved with ``save()``."""
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            return cls(
+                data["centroids"],
+                data["list_offsets"],
+                data["list_rows"],
+                data["codebooks"] if "codebooks" in data else None,
+                data["codes"] if "codes" in data else None,
+                nprobe=config["nprobe"],
+                rerank=config["rerank"]
+            )
@@ -0,0 +1,114 @@
+"""Cache of generated answers keyed on the exact completion request."""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from src.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """
+    Cache of chat completion answers keyed on a hash of the request.
+
+    The key covers the model, every prompt message (system and user, in
+    order), temperature and max_tokens, so an answer is only reused for a
+    byte-identical request: the same question with the same retrieved
+    context and prompt templates.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None):
+        """
+        Initialize the answer cache.
+
+        Args:
+            maxsize: Maximum number of answers kept
+            ttl: Optional time-to-live in seconds for cached answers
+        """
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """
+        Build the cache key for a completion request.
+
+        Args:
+            model: Chat model name
+            messages: Prompt messages sent to the model
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            Hex digest identifying the request
+        """
+        raw = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached answer."""
+        return self.memory.get(key)
+
+    def set(self, key: str, answer: str) -> None:
+        """Store an answer (empty answers are not cached)."""
+        if answer:
+            self.memory.set(key, answer)
+
+    def delete(self, key: str) -> bool:
+        """
+        Drop a cached answer (e.g. one the judge flagged for regeneration).
+        
+        Returns:
+            True if an answer was cached under the key
+        """
+        return self.memory.pop(key) is not None
+    
+    def record_bypass(self) -> None:
+        """Count a request that skipped the cache."""
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, maxsize, hits, misses, evictions, hit_rate and bypassed
+        """
+        stats = self.memory.stats()
+        stats["bypassed"] = self.bypassed
+        return stats
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Get the process-wide answer cache configured from settings.
+
+    Returns:
+        Shared AnswerCache, or None when ANSWER_CACHE_SIZE is 0
+    """
+    global _answer_cache
+    if settings.answer_cache_size <= 0:
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    maxsize=settings.answer_cache_size,
+                    ttl=settings.answer_cache_ttl or None
+                )
+                logger.info(f"Answer cache enabled (size={settings.answer_cache_size}, ttl={settings.answer_cache_ttl}s)")
+    return _answer_cache
@@ -0,0 +1,198 @@
+"""BM25 lexical index over uploaded chunks and reciprocal-rank fusion with dense results."""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from src.ann_index import top_k_rows
+
+logger = logging.getLogger(__name__)
+
+# Keeps codes like "SKU-1234", "30", "v2.1" and "e-mail" together as one term
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+(?:[-./][0-9a-z]+)*")
+SEPARATOR_PATTERN = re.compile(r"[-./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase a text and split it into terms.
+
+    Numbers and codes are kept whole ("sku-1234"), and compound terms also
+    yield their parts ("sku", "1234") so "SKU 1234" still matches.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(SEPARATOR_PATTERN.split(token))
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of chunks with a precomputed inverted index.
+
+    The BM25 weight of every (term, chunk) posting is computed at build
+    time, so a query only adds up the posting weights of its terms, one
+    vectorized add per term. Matches are returned as dicts in the Pinecone
+    match shape ({'id', 'score', 'metadata'}).
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        weights: np.ndarray,
+        ids: Sequence[str],
+        metadata: Sequence[Optional[dict]]
+    ):
+        """
+        Initialize from built arrays (use ``build()`` or ``load()``).
+
+        Args:
+            vocabulary: Term -> term number
+            offsets: Start of each term's postings (len(vocabulary) + 1,)
+            postings: Chunk rows, grouped by term
+            weights: BM25 weight of each posting
+            ids: Vector id of each chunk
+            metadata: Metadata (including 'text') of each chunk
+        """
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.ids = list(ids)
+        self.metadata = list(metadata)
+
+    @classmethod
+    def build(
+        cls,
+        texts: Sequence[str],
+        ids: Sequence[str],
+        metadata: Sequence[Optional[dict]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> "BM25Index":
+        """
+        Build the inverted index.
+
+        Args:
+            texts: Chunk texts
+            ids: Vector id of each chunk (the same ids as in the vector index)
+            metadata: Metadata of each chunk
+            k1: Term frequency saturation
+            b: Document length normalization
+
+        Returns:
+            BM25Index instance
+        """
+        vocabulary: Dict[str, int] = {}
+        term_rows: List[List[int]] = []
+        term_counts: List[List[int]] = []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + 1
+            lengths[row] = sum(counts.values())
+            for term, count in counts.items():
+                number = vocabulary.setdefault(term, len(vocabulary))
+                if number == len(term_rows):
+                    term_rows.append([])
+                    term_counts.append([])
+                term_rows[number].append(row)
+                term_counts[number].append(count)
+
+        n = max(len(texts), 1)
+        average_length = float(lengths.mean()) if len(texts) else 1.0
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(rows) for rows in term_rows])
+        postings = np.fromiter((row for rows in term_rows for row in rows), dtype=np.int32, count=int(offsets[-1]))
+        tf = np.fromiter((c for counts in term_counts for c in counts), dtype=np.float32, count=int(offsets[-1]))
+        df = np.diff(offsets).astype(np.float32)
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * lengths[postings] / (average_length or 1.0))
+        weights = (np.repeat(idf, np.diff(offsets)) * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+        logger.info(f"Built BM25 index: {len(texts)} chunks, {len(vocabulary)} terms")
+        return cls(vocabulary, offsets, postings, weights, ids, metadata)
+
+    def search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Find the top_k chunks for a query.
+
+        Args:
+            query: Query text
+            top_k: Maximum number of matches
+
+        Returns:
+            List of {'id', 'score', 'metadata'} dicts, best first (chunks sharing no term are omitted)
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            number = self.vocabulary.get(term)
+            if number is not None:
+                start, end = self.offsets[number], self.offsets[number + 1]
+                # A chunk appears at most once per term's postings, so plain fancy-index add is exact
+                scores[self.postings[start:end]] += self.weights[start:end]
+        matched = np.flatnonzero(scores)
+        top = matched[top_k_rows(scores[matched], top_k)]
+        return [{"id": self.ids[row], "score": float(scores[row]), "metadata": self.metadata[row]} for row in top]
+
+    def save(self, path: str) -> None:
+        """Save the index to a ``.npz`` file (written atomically)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            offsets=self.offsets,
+            postings=self.postings,
+            weights=self.weights,
+            vocabulary=np.array(json.dumps(self.vocabulary)),
+            ids=np.array(json.dumps(self.ids)),
+            metadata=np.array(json.dumps(self.metadata))
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"Saved BM25 index with {len(self.ids)} chunks to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index saved with ``save()``."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                json.loads(str(data["vocabulary"])),
+                data["offsets"],
+                data["postings"],
+                data["weights"],
+                json.loads(str(data["ids"])),
+                json.loads(str(data["metadata"]))
+            )
+
+
+def bm25_index_path(index_dir: str, index_name: str) -> str:
+    """Path of the saved BM25 index for an index name."""
+    return os.path.join(index_dir, f"{index_name}.bm25.npz")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[tuple]:
+    """
+    Fuse ranked id lists with reciprocal-rank fusion.
+
+    Each id scores sum(1 / (k + rank)) over the rankings it appears in
+    (rank starting at 1), so items ranked well by either retriever rise
+    without having to calibrate dense and BM25 scores against each other.
+
+    Args:
+        rankings: Ranked lists of ids, best first
+        k: RRF constant (larger values flatten the contribution of top ranks)
+
+    Returns:
+        List of (id, fused_score) tuples, best first
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -2,10 +2,8 @@
 
 import logging
 import time
-from typing import Optional
-from src.openai_client import OpenAIClient
-from src.pinecone_rag import PineconeRAG
-from src.ragmetrics_client import RagMetricsClient
+from typing import Callable, Optional
+from src.clients import get_chat_client, get_pinecone_rag, get_ragmetrics_client
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -18,12 +16,16 @@ class ChatEngine:
         """
         Initialize the chat engine with all required clients.
         
+        Clients come from the process-wide registry in src.clients, so
+        engines for the same bot (and bots sharing an API key) reuse warm
+        connections, caches and index metadata instead of rebuilding them.
+        
         Args:
             bot_type: Type of bot - "constitution", "retail", or "fitness" (defaults to "constitution")
         """
         try:
             self.bot_type = bot_type
-            self.openai_client = OpenAIClient()
+            self.openai_client = get_chat_client()
             
             # Set up Pinecone and RagMetrics based on bot type
             if bot_type == "retail":
@@ -31,28 +33,37 @@ class ChatEngine:
                 index_name = settings.pinecone_retail_index
                 host = settings.pinecone_retail_host
                 eval_group_id = settings.ragmetrics_retail_eval_group_id
+                min_score = settings.rag_retail_min_score
+                score_gap = settings.rag_retail_score_gap
                 logger.info(f"Initializing retail bot with index: {index_name}")
             elif bot_type == "fitness":
                 # Use fitness index and host
                 index_name = settings.pinecone_fitness_index
                 host = settings.pinecone_fitness_host
                 eval_group_id = settings.ragmetrics_fitness_eval_group_id or settings.ragmetrics_eval_group_id
+                min_score = settings.rag_fitness_min_score
+                score_gap = settings.rag_fitness_score_gap
                 logger.info(f"Initializing fitness bot with index: {index_name}")
             else:
                 # Use constitution index and host
                 index_name = settings.pinecone_index_name
                 host = settings.pinecone_host
                 eval_group_id = settings.ragmetrics_eval_group_id
+                min_score = None
+                score_gap = None
                 logger.info(f"Initializing constitution bot with index: {index_name}")
             
-            self.pinecone_rag = PineconeRAG(index_name=index_name, host=host)
-            self.ragmetrics_client = RagMetricsClient(eval_group_id=eval_group_id)
+            # Per-bot adaptive cutoff (None falls back to RAG_MIN_SCORE / RAG_SCORE_GAP)
+            self.pinecone_rag = get_pinecone_rag(
+                index_name=index_name, host=host, min_score=min_score, score_gap=score_gap
+            )
+            self.ragmetrics_client = get_ragmetrics_client(eval_group_id=eval_group_id)
             logger.info("Chat engine initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing chat engine: {str(e)}")
             raise
     
-    def process_question(self, question: str) -> dict:
+    def process_question(self, question: str, on_token: Optional[Callable[[str], None]] = None) -> dict:
         """
         Process a question through the full pipeline:
         1. Retrieve context from Pinecone RAG
@@ -61,6 +72,8 @@ class ChatEngine:
         
         Args:
             question: The user's question
+            on_token: Optional callback; when given, the answer is streamed and
+                each piece of text is passed to it as it arrives
             
         Returns:
             Dictionary containing:
@@ -83,7 +96,14 @@ class ChatEngine:
         
         # Step 2: Generate answer using OpenAI
         try:
-            answer = self.openai_client.generate_answer(question, context, bot_type=self.bot_type)
+            if on_token is None:
+                answer = self.openai_client.generate_answer(question, context, bot_type=self.bot_type)
+            else:
+                pieces = []
+                for piece in self.openai_client.stream_answer(question, context, bot_type=self.bot_type):
+                    pieces.append(piece)
+                    on_token(piece)
+                answer = "".join(pieces).strip()
             logger.info(f"Generated answer ({len(answer)} characters)")
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}")
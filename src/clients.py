@@ -0,0 +1,324 @@
+"""
+Process-wide registry of shared, connection-pooled API clients.
+
+Clients are keyed by (kind, api key, index/endpoint, host), created on first
+use and reused by every ChatEngine, so switching between bots reuses warm
+connections instead of building new clients per engine.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from pinecone import Pinecone
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Re-entrant: factories may request other shared clients while registering
+_lock = threading.RLock()
+_registry: Dict[tuple, Any] = {}
+# Async HTTP pools are bound to the event loop that created them
+_async_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+
+def _httpx_module():
+    """Return the httpx flavour the installed OpenAI SDK is built on."""
+    try:
+        import httpx2
+        if issubclass(DefaultHttpxClient, httpx2.Client):
+            return httpx2
+    except ImportError:
+        pass
+    import httpx
+    return httpx
+
+
+def build_openai_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0
+) -> OpenAI:
+    """
+    Build an OpenAI client backed by a keep-alive HTTP connection pool.
+
+    Args:
+        api_key: OpenAI API key
+        base_url: Optional API base URL override (e.g. a local stub server)
+        max_connections: Maximum number of concurrent connections in the pool
+        max_keepalive_connections: Maximum number of idle connections kept open
+        keepalive_expiry: Seconds an idle connection is kept before closing
+
+    Returns:
+        OpenAI client instance
+    """
+    http_client = DefaultHttpxClient(
+        limits=_build_limits(max_connections, max_keepalive_connections, keepalive_expiry)
+    )
+    client_params = {"api_key": api_key, "http_client": http_client}
+    if base_url:
+        client_params["base_url"] = base_url
+    return OpenAI(**client_params)
+
+
+def build_async_openai_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0
+) -> AsyncOpenAI:
+    """
+    Build an AsyncOpenAI client backed by a keep-alive HTTP connection pool.
+
+    Args:
+        api_key: OpenAI API key
+        base_url: Optional API base URL override (e.g. a local stub server)
+        max_connections: Maximum number of concurrent connections in the pool
+        max_keepalive_connections: Maximum number of idle connections kept open
+        keepalive_expiry: Seconds an idle connection is kept before closing
+
+    Returns:
+        AsyncOpenAI client instance
+    """
+    http_client = DefaultAsyncHttpxClient(
+        limits=_build_limits(max_connections, max_keepalive_connections, keepalive_expiry)
+    )
+    client_params = {"api_key": api_key, "http_client": http_client}
+    if base_url:
+        client_params["base_url"] = base_url
+    return AsyncOpenAI(**client_params)
+
+
+def _build_limits(max_connections: int, max_keepalive_connections: int, keepalive_expiry: float):
+    """Build connection pool limits for the installed httpx flavour."""
+    httpx = _httpx_module()
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+
+
+def _get_or_create(key: tuple, factory: Callable[[], Any]) -> Any:
+    """Return the registered client for key, creating it with factory on first use."""
+    client = _registry.get(key)
+    if client is None:
+        with _lock:
+            client = _registry.get(key)
+            if client is None:
+                client = factory()
+                _registry[key] = client
+    return client
+
+
+def _get_or_load_file(kind: str, path: str, factory: Callable[[], Any]) -> Any:
+    """
+    Return the registered object loaded from path, reloading it when the file changes.
+
+    The key includes the file's modification time, so an atomic re-upload
+    (os.replace) yields a fresh object; the entry for the previous version
+    is dropped so its memory map is released once no caller holds it.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    path = os.path.abspath(path)
+    key = (kind, path, os.stat(path).st_mtime_ns)
+    client = _registry.get(key)
+    if client is None:
+        with _lock:
+            client = _registry.get(key)
+            if client is None:
+                for old_key in [k for k in _registry if k[:2] == (kind, path)]:
+                    logger.info(f"Reloading {path} (file changed)")
+                    del _registry[old_key]
+                client = factory()
+                _registry[key] = client
+    return client
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Get the process-wide OpenAI client for the configured API key.
+
+    The client (and its connection pool) is created on first use and reused
+    by every caller, so chat completions and query embeddings share warm
+    connections instead of paying a new TLS handshake per request.
+
+    Returns:
+        Shared OpenAI client instance
+    """
+    def create() -> OpenAI:
+        logger.info(
+            f"Creating shared OpenAI client (max_connections={settings.openai_max_connections}, "
+            f"keepalive={settings.openai_max_keepalive_connections}/{settings.openai_keepalive_expiry}s)"
+        )
+        return build_openai_client(
+            api_key=settings.openai_api_key,
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry
+        )
+
+    return _get_or_create(("openai", settings.openai_api_key), create)
+
+
+def get_chat_client():
+    """
+    Get the shared OpenAIClient (chat completions) for the configured key and model.
+
+    Returns:
+        Shared OpenAIClient instance
+    """
+    from src.openai_client import OpenAIClient
+    return _get_or_create(("openai-chat", settings.openai_api_key, settings.openai_model), OpenAIClient)
+
+
+def get_pinecone_client() -> Pinecone:
+    """
+    Get the process-wide Pinecone client for the configured API key.
+
+    Returns:
+        Shared Pinecone client instance
+    """
+    api_key = settings.pinecone_api_key
+    return _get_or_create(("pinecone", api_key), lambda: Pinecone(api_key=api_key))
+
+
+def get_pinecone_index(index_name: str, host: Optional[str] = None):
+    """
+    Get a shared Pinecone index handle keyed by (api key, index, host).
+
+    Args:
+        index_name: Pinecone index name
+        host: Optional index host; when given, the control-plane lookup is skipped
+
+    Returns:
+        Shared pinecone Index instance
+    """
+    def create():
+        pc = get_pinecone_client()
+        if host:
+            return pc.Index(name=index_name, host=host)
+        return pc.Index(index_name)
+
+    return _get_or_create(("pinecone-index", settings.pinecone_api_key, index_name, host or ""), create)
+
+
+def get_local_index(index_name: str):
+    """
+    Get the shared in-process index loaded from LOCAL_INDEX_DIR (with its ANN index when LOCAL_ANN is on).
+
+    A new instance is loaded when the upload scripts replace the file.
+
+    Args:
+        index_name: Index name (file <LOCAL_INDEX_DIR>/<index_name>.vec)
+
+    Returns:
+        Shared LocalVectorIndex instance
+    """
+    from src.local_index import load_local_index, local_index_path
+    path = local_index_path(settings.local_index_dir, index_name)
+    return _get_or_load_file("local-index", path, lambda: load_local_index(index_name))
+
+
+def get_bm25_index(index_name: str):
+    """
+    Get the shared BM25 index saved by the upload scripts in LOCAL_INDEX_DIR.
+
+    A new instance is loaded when the upload scripts replace the file.
+
+    Args:
+        index_name: Index name (file <LOCAL_INDEX_DIR>/<index_name>.bm25.npz)
+
+    Returns:
+        Shared BM25Index instance
+
+    Raises:
+        FileNotFoundError: If no BM25 index was saved for this index
+    """
+    from src.bm25 import BM25Index, bm25_index_path
+    path = bm25_index_path(settings.local_index_dir, index_name)
+    return _get_or_load_file("bm25", path, lambda: BM25Index.load(path))
+
+
+def get_pinecone_rag(
+    index_name: Optional[str] = None,
+    host: Optional[str] = None,
+    min_score: Optional[float] = None,
+    score_gap: Optional[float] = None
+):
+    """
+    Get a shared PineconeRAG keyed by (api key, index, host, adaptive cutoff).
+
+    Args:
+        index_name: Optional index name (defaults to settings.pinecone_index_name)
+        host: Optional index host
+        min_score: Optional adaptive cutoff similarity threshold
+        score_gap: Optional adaptive cutoff score gap
+
+    Returns:
+        Shared PineconeRAG instance
+    """
+    from src.pinecone_rag import PineconeRAG
+    index_name = index_name or settings.pinecone_index_name
+    if index_name == settings.pinecone_index_name:
+        # The default index always uses the configured host (as PineconeRAG does)
+        host = host or settings.pinecone_host
+    key = (
+        "pinecone-rag", settings.rag_backend, settings.hybrid_search, settings.pinecone_api_key,
+        index_name, host or "", min_score, score_gap
+    )
+    return _get_or_create(
+        key,
+        lambda: PineconeRAG(index_name=index_name, host=host, min_score=min_score, score_gap=score_gap)
+    )
+
+
+def get_ragmetrics_client(eval_group_id: Optional[str] = None):
+    """
+    Get a shared RagMetricsClient keyed by (api key, base URL, eval group).
+
+    Args:
+        eval_group_id: Optional eval group ID (defaults to settings.ragmetrics_eval_group_id)
+
+    Returns:
+        Shared RagMetricsClient instance
+    """
+    from src.ragmetrics_client import RagMetricsClient
+    eval_group_id = eval_group_id or settings.ragmetrics_eval_group_id
+    key = ("ragmetrics", settings.ragmetrics_api_key, settings.ragmetrics_base_url, eval_group_id)
+    return _get_or_create(key, lambda: RagMetricsClient(eval_group_id=eval_group_id))
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client for the configured API key and the running event loop.
+
+    Async connection pools cannot be shared across event loops, so one
+    client is kept per loop and released when the loop is garbage collected.
+    Must be called from within a coroutine.
+
+    Returns:
+        Shared AsyncOpenAI client instance
+    """
+    loop = asyncio.get_running_loop()
+    api_key = settings.openai_api_key
+    with _lock:
+        clients = _async_openai_clients.setdefault(loop, {})
+        client = clients.get(api_key)
+        if client is None:
+            client = build_async_openai_client(
+                api_key=api_key,
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_keepalive_connections,
+                keepalive_expiry=settings.openai_keepalive_expiry
+            )
+            clients[api_key] = client
+    return client
@@ -0,0 +1,196 @@
+"""Token-budgeted packing of retrieved chunks into the prompt context."""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Try to use tiktoken for exact counts, fallback to a characters-per-token estimate
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+# Shortest shared prefix/suffix treated as chunking overlap rather than coincidence
+MIN_OVERLAP_CHARS = 50
+# A truncated passage shorter than this is dropped instead
+MIN_TRUNCATED_TOKENS = 32
+
+
+class TokenCounter:
+    """Counts and truncates text in tokens of the chat model (estimated without tiktoken)."""
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        """
+        Initialize the counter.
+
+        Args:
+            model: Chat model whose tokenizer is used
+        """
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        else:
+            logger.info(f"tiktoken not installed; estimating tokens as characters / {CHARS_PER_TOKEN}")
+
+    def count(self, text: str) -> int:
+        """Number of tokens in a text."""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut a text to at most max_tokens tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of head that is a prefix of tail (0 below MIN_OVERLAP_CHARS)."""
+    probe = tail[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    start = head.find(probe, max(0, len(head) - len(tail)))
+    while start != -1:
+        if tail.startswith(head[start:]):
+            return len(head) - start
+        start = head.find(probe, start + 1)
+    return 0
+
+
+def merge_adjacent_chunks(passages: Sequence[Tuple[str, float, Any]]) -> Tuple[List[Tuple[str, float]], int]:
+    """
+    Merge neighbouring chunks of the same source into contiguous passages.
+
+    Chunks whose metadata has the same 'source' and consecutive
+    'chunk_index' values are stitched in document order, removing the text
+    they share through the ingestion overlap. A merged passage keeps the
+    best score of its chunks. Chunks without source/chunk_index metadata are
+    passed through unchanged.
+
+    Args:
+        passages: (text, score, metadata) triples
+
+    Returns:
+        Tuple of ((text, score) pairs, number of chunks merged into a neighbour)
+    """
+    merged: List[Tuple[str, float]] = []
+    by_source: Dict[Any, List[Tuple[int, str, float]]] = {}
+    for text, score, metadata in passages:
+        chunk_index = metadata.get("chunk_index") if isinstance(metadata, dict) else None
+        if chunk_index is None:
+            merged.append((text, score))
+        else:
+            by_source.setdefault(metadata.get("source"), []).append((int(chunk_index), text, score))
+
+    merged_count = 0
+    for chunks in by_source.values():
+        chunks.sort(key=lambda chunk: chunk[0])
+        run_index, run_text, run_score = chunks[0]
+        for chunk_index, text, score in chunks[1:]:
+            if chunk_index == run_index:
+                # Same chunk returned twice (e.g. by dense and lexical retrieval)
+                run_score = max(run_score, score)
+                merged_count += 1
+                continue
+            if chunk_index == run_index + 1:
+                shared = _overlap(run_text, text)
+                run_text = run_text + (text[shared:] if shared else " " + text)
+                run_index, run_score = chunk_index, max(run_score, score)
+                merged_count += 1
+                continue
+            merged.append((run_text, run_score))
+            run_index, run_text, run_score = chunk_index, text, score
+        merged.append((run_text, run_score))
+    return merged, merged_count
+
+
+class ContextPacker:
+    """
+    Packs retrieved passages into a context string under a token budget.
+
+    Passages are taken best score first. Exact duplicates and passages
+    contained in an already packed one are dropped, and text shared with a
+    packed passage through the ingestion overlap is trimmed. Packing stops at
+    the budget; the passage that crosses it is truncated.
+    """
+
+    def __init__(self, token_budget: int = 2000, model: str = "gpt-3.5-turbo", separator: str = "\n\n"):
+        """
+        Initialize the packer.
+
+        Args:
+            token_budget: Maximum context tokens (0 for no limit)
+            model: Chat model whose tokenizer is used for counting
+            separator: Text placed between passages
+        """
+        self.token_budget = token_budget
+        self.separator = separator
+        self.counter = TokenCounter(model)
+        self.separator_tokens = self.counter.count(separator)
+
+    def _trim_overlap(self, text: str, packed: List[str], packed_normalized: List[str]) -> Optional[str]:
+        """Remove text already present in packed passages (None if nothing new remains)."""
+        normalized = " ".join(text.split())
+        for other in packed_normalized:
+            if normalized in other:
+                return None
+        for other in packed:
+            # Prefix of this passage repeats the end of a packed one, or its suffix repeats the start
+            shared = _overlap(other, text)
+            if shared:
+                text = text[shared:].lstrip()
+            shared = _overlap(text, other)
+            if shared:
+                text = text[:len(text) - shared].rstrip()
+        return text or None
+
+    def pack(self, passages: Sequence[Tuple[str, float]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the context string.
+
+        Args:
+            passages: (text, score) pairs
+
+        Returns:
+            Tuple of (context string, stats) where stats has 'tokens', 'passages',
+            'duplicates', 'trimmed_chars', 'truncated' and 'dropped'
+        """
+        stats = {"tokens": 0, "passages": 0, "duplicates": 0, "trimmed_chars": 0, "truncated": 0, "dropped": 0}
+        packed: List[str] = []
+        packed_normalized: List[str] = []
+        ordered = sorted((p for p in passages if p[0] and p[0].strip()), key=lambda p: p[1], reverse=True)
+        for i, (text, _) in enumerate(ordered):
+            text = text.strip()
+            trimmed = self._trim_overlap(text, packed, packed_normalized)
+            if trimmed is None:
+                stats["duplicates"] += 1
+                continue
+            stats["trimmed_chars"] += len(text) - len(trimmed)
+
+            tokens = self.counter.count(trimmed) + (self.separator_tokens if packed else 0)
+            if self.token_budget and stats["tokens"] + tokens > self.token_budget:
+                remaining = self.token_budget - stats["tokens"] - (self.separator_tokens if packed else 0)
+                if remaining >= MIN_TRUNCATED_TOKENS:
+                    trimmed = self.counter.truncate(trimmed, remaining).rstrip()
+                    tokens = self.counter.count(trimmed) + (self.separator_tokens if packed else 0)
+                    packed.append(trimmed)
+                    stats["tokens"] += tokens
+                    stats["truncated"] += 1
+                    stats["dropped"] += len(ordered) - i - 1
+                else:
+                    stats["dropped"] += len(ordered) - i
+                break
+            packed.append(trimmed)
+            packed_normalized.append(" ".join(trimmed.split()))
+            stats["tokens"] += tokens
+        stats["passages"] = len(packed)
+        return self.separator.join(packed), stats
@@ -0,0 +1,193 @@
+"""Query-embedding cache with an optional SQLite backend."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+import numpy as np
+from config.settings import settings
+from src.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (case-folded, collapsed whitespace)."""
+    return " ".join(query.split()).casefold()
+
+
+class EmbeddingCache:
+    """
+    Cache of query embeddings keyed on (normalized query, model, dimensions).
+
+    Vectors are stored as float32 arrays. An in-memory LRU tier answers hot
+    queries; when a SQLite path is configured, vectors are also persisted as
+    raw float32 blobs so the cache survives process restarts.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, path: Optional[str] = None):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            maxsize: Maximum number of vectors kept in memory
+            ttl: Optional time-to-live in seconds for cached vectors
+            path: Optional SQLite file used to persist vectors across restarts
+        """
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.path = path
+        self.disk_hits = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if path:
+            self._open(path)
+
+    def _open(self, path: str) -> None:
+        """Open (or create) the SQLite backend and drop expired rows."""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM embeddings WHERE created < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+            logger.info(f"Embedding cache persisted to SQLite: {path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open embedding cache at {path}: {str(e)} - using memory only")
+            self._conn = None
+
+    @staticmethod
+    def make_key(query: str, model: str, dimensions: Optional[int]) -> str:
+        """
+        Build the cache key for a query.
+
+        Args:
+            query: The raw query string
+            model: Embedding model name
+            dimensions: Requested embedding dimensions (None for the model default)
+
+        Returns:
+            Hex digest identifying (normalized query, model, dimensions)
+        """
+        raw = f"{model}\x1f{dimensions or ''}\x1f{normalize_query(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, model: str, dimensions: Optional[int]) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding.
+
+        Args:
+            query: The raw query string
+            model: Embedding model name
+            dimensions: Requested embedding dimensions
+
+        Returns:
+            float32 embedding vector, or None on a miss
+        """
+        key = self.make_key(query, model, dimensions)
+        vector = self.memory.get(key)
+        if vector is not None or self._conn is None:
+            return vector
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT vector, created FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            # A locked or corrupt cache is a miss, never a failed query
+            logger.warning(f"Could not read cached embedding: {str(e)}")
+            return None
+        if row is None:
+            return None
+        blob, created = row
+        if self.ttl is not None and time.time() - created >= self.ttl:
+            return None
+        vector = np.frombuffer(blob, dtype=np.float32)
+        with self._lock:
+            self.disk_hits += 1
+        self.memory.set(key, vector)
+        return vector
+
+    def set(self, query: str, model: str, dimensions: Optional[int], vector) -> np.ndarray:
+        """
+        Store an embedding.
+
+        Args:
+            query: The raw query string
+            model: Embedding model name
+            dimensions: Requested embedding dimensions
+            vector: Embedding values (any sequence of floats)
+
+        Returns:
+            The stored float32 vector (read-only)
+        """
+        key = self.make_key(query, model, dimensions)
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        self.memory.set(key, vector)
+        if self._conn is not None:
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector, created) VALUES (?, ?, ?)",
+                        (key, vector.tobytes(), time.time())
+                    )
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not persist embedding: {str(e)}")
+        return vector
+
+    def clear(self) -> None:
+        """Remove all cached embeddings (memory and disk)."""
+        self.memory.clear()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Memory-tier statistics plus disk_hits and whether persistence is enabled
+        """
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["persistent"] = self._conn is not None
+        return stats
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache configured from settings.
+
+    Returns:
+        Shared EmbeddingCache, or None when EMBEDDING_CACHE_SIZE is 0
+    """
+    global _embedding_cache
+    if settings.embedding_cache_size <= 0:
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    maxsize=settings.embedding_cache_size,
+                    ttl=settings.embedding_cache_ttl or None,
+                    path=settings.embedding_cache_path
+                )
+    return _embedding_cache
@@ -0,0 +1,97 @@
+"""On-disk snapshots of vector index metadata (dimension, namespaces, vector counts)."""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _snapshot_path(cache_dir: str, index_name: str) -> str:
+    return os.path.join(cache_dir, f"index-{index_name}.json")
+
+
+def _get(obj: Any, key: str, default: Any = None) -> Any:
+    """Read a field from a dict or an object attribute."""
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def snapshot_from_stats(stats: Any) -> Dict[str, Any]:
+    """
+    Build a metadata snapshot from describe_index_stats() output.
+
+    Args:
+        stats: Index stats (dict or pinecone DescribeIndexStatsResponse)
+
+    Returns:
+        Dictionary with 'dimension', 'namespaces' ({name: vector_count}),
+        'total_vector_count' and 'fetched_at'
+    """
+    namespaces = _get(stats, "namespaces") or {}
+    if not isinstance(namespaces, dict):
+        namespaces = {}
+
+    dimension = _get(stats, "dimension")
+    if not dimension and namespaces:
+        # Try to get from the first namespace
+        dimension = _get(list(namespaces.values())[0], "dimension")
+
+    vector_counts = {name: int(_get(info, "vector_count", 0) or 0) for name, info in namespaces.items()}
+    return {
+        "dimension": int(dimension) if dimension else None,
+        "namespaces": vector_counts,
+        "total_vector_count": int(_get(stats, "total_vector_count", 0) or sum(vector_counts.values())),
+        "fetched_at": time.time()
+    }
+
+
+def load_snapshot(cache_dir: str, index_name: str, max_age: float) -> Optional[Dict[str, Any]]:
+    """
+    Load a metadata snapshot if one exists and is younger than max_age.
+
+    Args:
+        cache_dir: Directory holding snapshots
+        index_name: Vector index name
+        max_age: Maximum snapshot age in seconds (0 or less never uses a snapshot)
+
+    Returns:
+        Snapshot dictionary, or None if missing, stale or unreadable
+    """
+    if max_age <= 0:
+        return None
+    try:
+        with open(_snapshot_path(cache_dir, index_name), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - snapshot.get("fetched_at", 0) >= max_age:
+        logger.info(f"Index metadata snapshot for '{index_name}' is stale, refreshing")
+        return None
+    return snapshot
+
+
+def save_snapshot(cache_dir: str, index_name: str, snapshot: Dict[str, Any]) -> None:
+    """Write a metadata snapshot atomically (failures are logged, not raised)."""
+    path = _snapshot_path(cache_dir, index_name)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not save index metadata snapshot to {path}: {str(e)}")
+
+
+def clear_snapshot(cache_dir: str, index_name: str) -> None:
+    """Delete the metadata snapshot of an index (e.g. after an upload changed it)."""
+    try:
+        os.remove(_snapshot_path(cache_dir, index_name))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove index metadata snapshot for '{index_name}': {str(e)}")
@@ -0,0 +1,86 @@
+"""Fixed-bucket latency histograms for outbound API calls."""
+
+import threading
+from typing import Any, Dict, Hashable, Sequence
+
+# Upper bounds of the histogram buckets in milliseconds (the last bucket is open-ended)
+DEFAULT_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistograms:
+    """
+    Thread-safe latency histograms keyed by an outcome label.
+
+    Each key (e.g. an HTTP status code, or "error" for a failed request)
+    gets its own count, total, max and bucket counts, so slow successes can
+    be told apart from slow throttling or server errors.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize the histograms.
+
+        Args:
+            buckets_ms: Increasing bucket upper bounds in milliseconds
+        """
+        self.buckets_ms = tuple(buckets_ms)
+        self._data: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        """
+        Record one observation.
+
+        Args:
+            key: Outcome label (status code or error name)
+            seconds: Observed latency in seconds
+        """
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(self.buckets_ms) if ms <= bound), len(self.buckets_ms))
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(self.buckets_ms) + 1)}
+                self._data[key] = entry
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["buckets"][bucket] += 1
+
+    def _percentile(self, buckets: Sequence[int], count: int, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of observations."""
+        target = fraction * count
+        seen = 0
+        for bound, n in zip(self.buckets_ms + (float("inf"),), buckets):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Get the histograms.
+
+        Returns:
+            Per key: 'count', 'mean_ms', 'max_ms', 'p50_ms' and 'p95_ms' (bucket
+            upper bounds) and 'buckets' mapping "<=bound" labels to counts
+        """
+        labels = [f"<={bound:g}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]:g}ms"]
+        with self._lock:
+            data = {key: dict(entry, buckets=list(entry["buckets"])) for key, entry in self._data.items()}
+        return {
+            key: {
+                "count": entry["count"],
+                "mean_ms": entry["total_ms"] / entry["count"],
+                "max_ms": entry["max_ms"],
+                "p50_ms": self._percentile(entry["buckets"], entry["count"], 0.5),
+                "p95_ms": self._percentile(entry["buckets"], entry["count"], 0.95),
+                "buckets": {label: n for label, n in zip(labels, entry["buckets"]) if n}
+            }
+            for key, entry in data.items()
+        }
+
+    def clear(self) -> None:
+        """Drop all observations."""
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,470 @@
+"""In-process vector index backed by a NumPy float32 (or memory-mapped) matrix."""
+
+import collections.abc
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence
+import numpy as np
+from config.settings import settings
+from src.ann_index import IVFPQIndex, top_k_rows
+from src.bm25 import BM25Index, bm25_index_path
+from src.vector_store import VectorStore, write_vector_store
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("cosine", "dotproduct")
+
+# Rows converted to float32 at a time when scoring a float16 store
+SCORE_BLOCK_SIZE = 65536
+
+
+def _fingerprint(ns: "_Namespace") -> str:
+    """
+    Hash of a namespace's ids and vectors, used to detect a stale ANN index.
+
+    Vectors are hashed as float16 so the fingerprint is the same before and
+    after a float16 (LOCAL_INDEX_DTYPE) round trip through the vector store.
+    """
+    digest = hashlib.sha1()
+    for vector_id in ns.ids:
+        digest.update(vector_id.encode("utf-8") + b"\0")
+    for start in range(0, len(ns.vectors), SCORE_BLOCK_SIZE):
+        digest.update(np.ascontiguousarray(ns.vectors[start:start + SCORE_BLOCK_SIZE], dtype=np.float16).tobytes())
+    return digest.hexdigest()
+
+
+class _StoreRows(collections.abc.Sequence):
+    """Ids or metadata of a namespace, decoded from a VectorStore on access."""
+
+    def __init__(self, start: int, count: int, getter):
+        self.start = start
+        self.count = count
+        self.getter = getter
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self.count))]
+        if row < 0:
+            row += self.count
+        if not 0 <= row < self.count:
+            raise IndexError(row)
+        return self.getter(self.start + int(row))
+
+
+class _Namespace:
+    """Vectors, ids and metadata of one namespace, stored row-aligned."""
+
+    def __init__(self, dimension: int):
+        self.ids: Sequence[str] = []
+        self.rows: Optional[Dict[str, int]] = {}
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.metadata: Sequence[Optional[dict]] = []
+
+    @classmethod
+    def from_store(cls, store: VectorStore, start: int, count: int) -> "_Namespace":
+        """Zero-copy namespace over rows [start, start + count) of a mapped store."""
+        ns = cls(store.dimension)
+        ns.vectors = store.vectors[start:start + count]
+        ns.ids = _StoreRows(start, count, store.get_id)
+        ns.metadata = _StoreRows(start, count, store.get_metadata)
+        ns.rows = None
+        return ns
+
+    def _materialize(self) -> None:
+        """Copy a store-backed (read-only) namespace into memory before modifying it."""
+        self.ids = list(self.ids)
+        self.metadata = list(self.metadata)
+        self.vectors = np.array(self.vectors, dtype=np.float32)
+        self.rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, metadata: Sequence[Optional[dict]]) -> None:
+        if self.rows is None:
+            self._materialize()
+        new_rows = []
+        for i, vector_id in enumerate(ids):
+            row = self.rows.get(vector_id)
+            if row is None:
+                new_rows.append(i)
+            else:
+                self.vectors[row] = vectors[i]
+                self.metadata[row] = metadata[i]
+        if new_rows:
+            start = len(self.ids)
+            for offset, i in enumerate(new_rows):
+                self.rows[ids[i]] = start + offset
+                self.ids.append(ids[i])
+                self.metadata.append(metadata[i])
+            self.vectors = np.vstack([self.vectors, vectors[new_rows]])
+
+
+class LocalVectorIndex:
+    """
+    Exact (brute-force) vector index with the query interface of a Pinecone index.
+
+    Vectors are kept per namespace in a contiguous float32 matrix (or a
+    read-only memory-mapped float32/float16 matrix once loaded). A query
+    scores every row with one matrix-vector product and selects the top_k
+    rows with ``argpartition``, so small corpora are served without a
+    network hop. ``query()`` and ``describe_index_stats()`` return plain
+    dicts in the Pinecone response shape, so PineconeRAG can use this class
+    as a drop-in ``index``.
+
+    For large corpora, ``build_ann()`` attaches an IVF(-PQ) index per
+    namespace and queries switch to approximate search.
+    """
+
+    def __init__(self, dimension: int, metric: str = "cosine"):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimension: Vector dimension
+            metric: "cosine" (vectors are L2-normalized on insert) or "dotproduct"
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported metric '{metric}', expected one of {METRICS}")
+        self.dimension = dimension
+        self.metric = metric
+        self.namespaces: Dict[str, _Namespace] = {}
+        self.ann: Dict[str, IVFPQIndex] = {}
+        self._lock = threading.Lock()
+
+    def _prepare(self, vectors: Any) -> np.ndarray:
+        """Convert vectors to a float32 matrix, normalized for cosine scoring."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension ({matrix.shape[1]}) doesn't match index dimension ({self.dimension})")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        return matrix
+
+    def upsert(self, vectors: Iterable[dict], namespace: str = "") -> Dict[str, int]:
+        """
+        Insert or update vectors.
+
+        Args:
+            vectors: Pinecone-style records ({'id', 'values', 'metadata'})
+            namespace: Target namespace
+
+        Returns:
+            Dictionary with 'upserted_count'
+        """
+        records = list(vectors)
+        if not records:
+            return {"upserted_count": 0}
+        ids = [str(record["id"]) for record in records]
+        matrix = self._prepare([record["values"] for record in records])
+        metadata = [record.get("metadata") for record in records]
+        with self._lock:
+            ns = self.namespaces.get(namespace or "")
+            if ns is None:
+                ns = self.namespaces[namespace or ""] = _Namespace(self.dimension)
+            ns.upsert(ids, matrix, metadata)
+            if self.ann.pop(namespace or "", None) is not None:
+                logger.warning(f"Dropped the ANN index of namespace '{namespace}' after an upsert; call build_ann() again")
+        return {"upserted_count": len(records)}
+
+    def query(
+        self,
+        vector: Any,
+        top_k: int = 5,
+        namespace: str = "",
+        include_metadata: bool = False,
+        include_values: bool = False,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Find the top_k most similar vectors in a namespace.
+
+        Args:
+            vector: Query vector (list or array)
+            top_k: Number of matches to return
+            namespace: Namespace to search
+            include_metadata: Include each match's metadata
+            include_values: Include each match's vector values
+
+        Returns:
+            Dictionary with 'matches' (list of {'id', 'score', 'metadata'?, 'values'?})
+            and 'namespace', highest score first
+        """
+        if kwargs:
+            logger.debug(f"Ignoring unsupported query arguments: {sorted(kwargs)}")
+        ns = self.namespaces.get(namespace or "")
+        if ns is None or not ns.ids or top_k <= 0:
+            return {"matches": [], "namespace": namespace or ""}
+
+        query_vector = self._prepare(vector)[0]
+        ann = self.ann.get(namespace or "")
+        if ann is not None:
+            top, top_scores = ann.search(query_vector, top_k, ns.vectors)
+        else:
+            scores = self._score(ns.vectors, query_vector)
+            top = top_k_rows(scores, top_k)
+            top_scores = scores[top]
+
+        matches = []
+        for row, score in zip(top, top_scores):
+            match = {"id": ns.ids[row], "score": float(score)}
+            if include_metadata:
+                match["metadata"] = ns.metadata[row]
+            if include_values:
+                match["values"] = ns.vectors[row].tolist()
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    @staticmethod
+    def _score(vectors: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+        """Score every row against the query (float16 rows are upcast block by block)."""
+        if vectors.dtype == np.float32:
+            return vectors @ query_vector
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_SIZE):
+            block = vectors[start:start + SCORE_BLOCK_SIZE]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query_vector
+        return scores
+
+    def build_ann(self, nlist: int = 0, pq_m: int = 0, nprobe: int = 8, rerank: int = 100) -> None:
+        """
+        Build an IVF(-PQ) index for every namespace (see IVFPQIndex.build).
+
+        Args:
+            nlist: Number of inverted lists (0 picks 4 * sqrt(n))
+            pq_m: Number of PQ sub-quantizers (0 disables PQ)
+            nprobe: Number of lists scanned per query
+            rerank: Number of PQ candidates rescored exactly
+        """
+        for name, ns in self.namespaces.items():
+            if ns.ids:
+                self.ann[name] = IVFPQIndex.build(ns.vectors, nlist=nlist, pq_m=pq_m, nprobe=nprobe, rerank=rerank)
+
+    def set_ann_params(self, nprobe: int, rerank: int) -> None:
+        """Set the query-time recall/latency knobs of every attached ANN index."""
+        for ann in self.ann.values():
+            ann.nprobe = nprobe
+            ann.rerank = rerank
+
+    def save_ann(self, directory: str) -> None:
+        """
+        Save the ANN index of every namespace into a directory (one file each).
+
+        namespaces.json records a fingerprint of each namespace's ids and
+        vectors, so ``load_ann()`` can tell when the index was built for
+        different data.
+        """
+        os.makedirs(directory, exist_ok=True)
+        names = list(self.ann)
+        for i, name in enumerate(names):
+            self.ann[name].save(os.path.join(directory, f"ns-{i}.npz"))
+        fingerprints = {name: _fingerprint(self.namespaces[name]) for name in names if name in self.namespaces}
+        with open(os.path.join(directory, "namespaces.json"), "w", encoding="utf-8") as f:
+            json.dump({"namespaces": names, "fingerprints": fingerprints}, f)
+
+    def load_ann(self, directory: str) -> bool:
+        """
+        Attach ANN indexes saved with ``save_ann()``.
+
+        Args:
+            directory: Directory written by ``save_ann()``
+
+        Returns:
+            True if an ANN index built from the current ids and vectors (same
+            fingerprint) was loaded for every non-empty namespace
+        """
+        try:
+            with open(os.path.join(directory, "namespaces.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if not isinstance(manifest, dict):
+                raise ValueError("saved without fingerprints")
+            names, fingerprints = manifest["namespaces"], manifest["fingerprints"]
+            loaded = {name: IVFPQIndex.load(os.path.join(directory, f"ns-{i}.npz")) for i, name in enumerate(names)}
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"No usable ANN index in {directory}: {str(e)}")
+            return False
+        for name, ns in self.namespaces.items():
+            ann = loaded.get(name)
+            if ns.ids and (ann is None or fingerprints.get(name) != _fingerprint(ns)):
+                logger.warning(f"ANN index in {directory} is out of date for namespace '{name}'")
+                return False
+        self.ann = {name: ann for name, ann in loaded.items() if name in self.namespaces}
+        return True
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics in the Pinecone response shape.
+
+        Returns:
+            Dictionary with 'dimension', 'namespaces' ({name: {'vector_count'}})
+            and 'total_vector_count'
+        """
+        namespaces = {name: {"vector_count": len(ns.ids)} for name, ns in self.namespaces.items()}
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(info["vector_count"] for info in namespaces.values())
+        }
+
+    def save(self, path: str, dtype: str = "float32") -> None:
+        """
+        Save the index as a memory-mappable vector store file (see src.vector_store).
+
+        Args:
+            path: Destination file path
+            dtype: Stored vector type, "float32" or "float16"
+        """
+        write_vector_store(
+            path,
+            [(name, ns.ids, ns.vectors, ns.metadata) for name, ns in self.namespaces.items()],
+            dimension=self.dimension,
+            metric=self.metric,
+            dtype=dtype
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        """
+        Open an index saved with ``save()`` without reading it into memory.
+
+        The vector matrix is memory-mapped read-only (zero-copy and shared
+        with other processes mapping the same file); chunk text and metadata
+        are decoded only for returned matches. Upserting into a loaded
+        namespace copies it into memory first.
+
+        Args:
+            path: Index file path
+
+        Returns:
+            LocalVectorIndex instance
+        """
+        store = VectorStore(path)
+        index = cls(dimension=store.dimension, metric=store.metric)
+        for name, (start, count) in store.namespaces.items():
+            # Stored vectors are already normalized; use them as-is
+            index.namespaces[name] = _Namespace.from_store(store, start, count)
+        logger.info(f"Mapped local index with {store.count} {store.dtype} vectors from {path}")
+        return index
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        source: str,
+        id_prefix: str,
+        namespace: str = "",
+        metric: str = "cosine"
+    ) -> "LocalVectorIndex":
+        """
+        Build an index from the chunks and embeddings produced by the upload scripts.
+
+        Records use the same ids and metadata as the Pinecone upload
+        ('{id_prefix}-{i}', {'text', 'source', 'chunk_index'}).
+
+        Args:
+            chunks: Text chunks
+            embeddings: One embedding per chunk
+            source: Source document name stored in metadata
+            id_prefix: Vector id prefix, e.g. "retail-policy"
+            namespace: Namespace to store the vectors in
+            metric: Similarity metric
+
+        Returns:
+            LocalVectorIndex instance
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError(f"Mismatch: {len(chunks)} chunks but {len(embeddings)} embeddings")
+        if len(embeddings) == 0:
+            raise ValueError("Cannot build a local index without embeddings")
+        index = cls(dimension=len(embeddings[0]), metric=metric)
+        index.upsert(
+            [
+                {
+                    "id": f"{id_prefix}-{i}",
+                    "values": embedding,
+                    "metadata": {"text": chunk, "source": source, "chunk_index": i}
+                }
+                for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+            ],
+            namespace=namespace
+        )
+        return index
+
+
+def local_index_path(index_dir: str, index_name: str) -> str:
+    """Path of the saved local index for an index name."""
+    return os.path.join(index_dir, f"{index_name}.vec")
+
+
+def local_ann_dir(index_dir: str, index_name: str) -> str:
+    """Directory of the saved ANN indexes for an index name."""
+    return os.path.join(index_dir, f"{index_name}.ann")
+
+
+def _build_ann_from_settings(index: LocalVectorIndex) -> None:
+    index.build_ann(
+        nlist=settings.ann_nlist,
+        pq_m=settings.ann_pq_m,
+        nprobe=settings.ann_nprobe,
+        rerank=settings.ann_rerank
+    )
+
+
+def write_local_index(index: LocalVectorIndex, index_name: str) -> None:
+    """
+    Save a local index under LOCAL_INDEX_DIR, with its ANN index when LOCAL_ANN is on.
+
+    A stale ANN index from a previous ingestion is removed when LOCAL_ANN is off.
+    The BM25 index used by hybrid retrieval (HYBRID_SEARCH) is always written,
+    covering the chunks of every namespace.
+
+    Args:
+        index: Index to save
+        index_name: Index name
+    """
+    index.save(local_index_path(settings.local_index_dir, index_name), dtype=settings.local_index_dtype)
+    ann_dir = local_ann_dir(settings.local_index_dir, index_name)
+    if settings.local_ann:
+        _build_ann_from_settings(index)
+        index.save_ann(ann_dir)
+    elif os.path.isdir(ann_dir):
+        shutil.rmtree(ann_dir, ignore_errors=True)
+
+    ids, metadata = [], []
+    for ns in index.namespaces.values():
+        ids.extend(ns.ids)
+        metadata.extend(ns.metadata)
+    texts = [(meta or {}).get("text", "") for meta in metadata]
+    BM25Index.build(texts, ids, metadata).save(bm25_index_path(settings.local_index_dir, index_name))
+
+
+def load_local_index(index_name: str) -> LocalVectorIndex:
+    """
+    Load a local index from LOCAL_INDEX_DIR.
+
+    With LOCAL_ANN on, the saved ANN index is attached (built and saved
+    first if missing or out of date) and ANN_NPROBE / ANN_RERANK are applied.
+
+    Args:
+        index_name: Index name
+
+    Returns:
+        LocalVectorIndex instance
+    """
+    index = LocalVectorIndex.load(local_index_path(settings.local_index_dir, index_name))
+    if settings.local_ann:
+        ann_dir = local_ann_dir(settings.local_index_dir, index_name)
+        if not index.load_ann(ann_dir):
+            _build_ann_from_settings(index)
+            index.save_ann(ann_dir)
+        index.set_ann_params(nprobe=settings.ann_nprobe, rerank=settings.ann_rerank)
+    return index
@@ -0,0 +1,117 @@
+"""Decoding of vector index query responses into matches and chunk text."""
+
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys that may hold the chunk text, in lookup order
+TEXT_KEYS = ("text", "content", "chunk", "page_content", "document", "value")
+
+
+class MatchDecoder:
+    """
+    Extracts matches, metadata and text from query responses of one index.
+
+    The response shape (plain dict, object with ``.matches`` or object with
+    only ``to_dict()``) and the metadata key holding the text are detected
+    on the first response and cached, so later queries skip the
+    whole-response ``to_dict()`` conversion and the chain of metadata
+    lookups.
+    """
+
+    def __init__(self, index_name: str = ""):
+        """
+        Initialize the decoder.
+
+        Args:
+            index_name: Name of the index this decoder serves (for logging)
+        """
+        self.index_name = index_name
+        self.response_shape: Optional[str] = None
+        self.text_key: Optional[str] = None
+
+    def _detect_response_shape(self, response: Any) -> str:
+        if isinstance(response, dict):
+            return "dict"
+        if hasattr(response, "matches"):
+            return "object"
+        if hasattr(response, "to_dict"):
+            return "to_dict"
+        return "unknown"
+
+    def get_matches(self, response: Any) -> List:
+        """
+        Get the list of matches from a query response.
+
+        Args:
+            response: Query response (dict or pinecone QueryResponse)
+
+        Returns:
+            List of matches (dicts or match objects)
+        """
+        if self.response_shape is None:
+            self.response_shape = self._detect_response_shape(response)
+            logger.info(f"Detected '{self.response_shape}' query response shape for index '{self.index_name}'")
+
+        if self.response_shape == "object":
+            matches = getattr(response, "matches", None)
+        elif self.response_shape == "dict":
+            matches = response.get("matches") if isinstance(response, dict) else None
+        elif self.response_shape == "to_dict":
+            matches = response.to_dict().get("matches")
+        else:
+            matches = getattr(response, "__dict__", {}).get("matches")
+
+        if matches is None:
+            # Shape changed (e.g. client upgraded mid-process); detect again next time
+            logger.warning(f"Could not extract matches from {type(response).__name__} response")
+            self.response_shape = None
+            return []
+        return matches
+
+    def get_metadata(self, match: Any) -> Any:
+        """Get the metadata of a match (dict, string or None)."""
+        if isinstance(match, dict):
+            return match.get("metadata")
+        return getattr(match, "metadata", None)
+
+    def get_score(self, match: Any) -> float:
+        """Get the similarity score of a match (0.0 if missing)."""
+        score = match.get("score") if isinstance(match, dict) else getattr(match, "score", None)
+        return score if score is not None else 0.0
+
+    def get_id(self, match: Any) -> str:
+        """Get the vector id of a match."""
+        return match.get("id", "") if isinstance(match, dict) else getattr(match, "id", "")
+
+    def get_text(self, match: Any) -> str:
+        """
+        Get the chunk text of a match.
+
+        Uses the cached text key when known, falling back to the common
+        metadata keys (and caching the first one that holds text).
+
+        Args:
+            match: A single match
+
+        Returns:
+            The chunk text, or an empty string if none could be found
+        """
+        metadata = self.get_metadata(match)
+        if isinstance(metadata, dict):
+            if self.text_key is not None:
+                text = metadata.get(self.text_key)
+                if text and isinstance(text, str):
+                    return text
+            for key in TEXT_KEYS:
+                text = metadata.get(key)
+                if text:
+                    if self.text_key is None:
+                        self.text_key = key
+                        logger.info(f"Using metadata key '{key}' for text in index '{self.index_name}'")
+                    return text if isinstance(text, str) else str(text)
+            return str(metadata) if metadata else ""
+        if isinstance(metadata, str):
+            return metadata
+        return str(metadata) if metadata else ""
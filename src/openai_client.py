@@ -1,27 +1,56 @@
 """OpenAI API client for chat completion."""
 
+import asyncio
 import logging
-from typing import Optional
-from openai import OpenAI
+import threading
+import weakref
+from typing import Any, Dict, Iterator, Optional
 from config.settings import settings
-from src.prompt import get_chat_prompt, get_regenerate_prompt
+from src.answer_cache import get_answer_cache
+from src.clients import get_async_openai_client, get_openai_client
+from src.prompt import build_messages, get_chat_prompt, get_prompt_prefix, get_regenerate_prompt
 
 logger = logging.getLogger(__name__)
 
+# Sampling parameters of every answer completion (part of the answer cache key)
+TEMPERATURE = 0.7
+MAX_TOKENS = 500
+
 
 class OpenAIClient:
     """Client for interacting with OpenAI API."""
     
-    def __init__(self):
-        """Initialize OpenAI client with API key from settings."""
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    def __init__(self, max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Initialize OpenAI client with API key from settings.
+        
+        The async methods share the per-event-loop AsyncOpenAI client from
+        src.clients, so concurrent conversations reuse one connection pool.
+        
+        Args:
+            max_concurrency: Maximum in-flight async completions per event loop
+                (defaults to settings.openai_max_concurrency)
+            timeout: Default per-call timeout in seconds for async completions
+                (defaults to settings.openai_timeout)
+        """
+        self.client = get_openai_client()
         self.model = settings.openai_model
+        self.max_concurrency = max_concurrency or settings.openai_max_concurrency
+        self.timeout = timeout or settings.openai_timeout
+        # asyncio.Semaphore is bound to the loop it is first used on
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        # Prompt cache instrumentation (see record_usage)
+        self._usage_lock = threading.Lock()
+        self._usage = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        # Optional cache of answers for identical requests (None when ANSWER_CACHE_SIZE is 0)
+        self.answer_cache = get_answer_cache()
     
     def generate_answer(
         self, 
         question: str, 
         context: Optional[str] = None,
-        bot_type: str = "constitution"
+        bot_type: str = "constitution",
+        use_cache: bool = True
     ) -> str:
         """
         Generate an answer to a question using OpenAI chat completion.
@@ -30,6 +59,7 @@ class OpenAIClient:
             question: The user's question
             context: Optional context from RAG system to include in the prompt
             bot_type: Type of bot - "constitution" or "retail" (defaults to "constitution")
+            use_cache: Set to False to bypass the answer cache for this call
             
         Returns:
             The generated answer string
@@ -43,18 +73,23 @@ class OpenAIClient:
                 bot_type=bot_type
             )
             
+            messages = build_messages(get_prompt_prefix(context_str), system_content, user_content)
+            cache_key = self._answer_cache_key(messages, use_cache)
+            cached = self._cached_answer(cache_key)
+            if cached is not None:
+                return cached
+            
             # Call OpenAI API
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=0.7,
-                max_tokens=500
+                messages=messages,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
             )
             
+            self.record_usage(response.usage)
             answer = response.choices[0].message.content.strip()
+            self._store_answer(cache_key, answer)
             logger.info(f"Generated answer using model: {self.model}")
             return answer
             
@@ -62,12 +97,77 @@ class OpenAIClient:
             logger.error(f"Error generating answer from OpenAI: {str(e)}")
             raise
     
+    def stream_answer(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        bot_type: str = "constitution",
+        use_cache: bool = True
+    ) -> Iterator[str]:
+        """
+        Streaming variant of generate_answer that yields text as it arrives.
+        
+        Uses the same prompt and sampling parameters as generate_answer, so
+        joining the yielded pieces gives the same kind of answer; callers
+        show tokens immediately and strip the joined text at the end.
+        
+        Args:
+            question: The user's question
+            context: Optional context from RAG system to include in the prompt
+            bot_type: Type of bot - "constitution" or "retail" (defaults to "constitution")
+            use_cache: Set to False to bypass the answer cache for this call
+            
+        Yields:
+            Pieces of the answer text, in order
+        """
+        try:
+            # Get prompts from prompt.py
+            context_str = context if context else ""
+            system_content, user_content = get_chat_prompt(
+                question=question,
+                context=context_str,
+                bot_type=bot_type
+            )
+            
+            messages = build_messages(get_prompt_prefix(context_str), system_content, user_content)
+            cache_key = self._answer_cache_key(messages, use_cache)
+            cached = self._cached_answer(cache_key)
+            if cached is not None:
+                yield cached
+                return
+            
+            # Call OpenAI API with server-sent events
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            pieces = []
+            for chunk in stream:
+                # The final chunk carries the usage and no choices
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pieces.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None) is not None:
+                    self.record_usage(chunk.usage)
+            self._store_answer(cache_key, "".join(pieces).strip())
+            logger.info(f"Streamed answer using model: {self.model}")
+            
+        except Exception as e:
+            logger.error(f"Error streaming answer from OpenAI: {str(e)}")
+            raise
+    
     def regenerate_answer(
         self,
         question: str,
         previous_answer: str,
         context: Optional[str] = None,
-        bot_type: str = "constitution"
+        bot_type: str = "constitution",
+        use_cache: bool = True
     ) -> str:
         """
         Regenerate an answer after detecting hallucinations.
@@ -77,6 +177,7 @@ class OpenAIClient:
             previous_answer: The previous answer that had hallucinations
             context: Optional context from RAG system to include in the prompt
             bot_type: Type of bot - "constitution" or "retail" (defaults to "constitution")
+            use_cache: Set to False to bypass the answer cache for this call
             
         Returns:
             The regenerated answer string
@@ -84,6 +185,8 @@ class OpenAIClient:
         try:
             # Get regenerate prompts from prompt.py
             context_str = context if context else ""
+            # The judge flagged the original answer; do not serve it again
+            self._evict_answer(question, context_str, bot_type)
             system_content, user_content = get_regenerate_prompt(
                 question=question,
                 previous_answer=previous_answer,
@@ -91,22 +194,209 @@ class OpenAIClient:
                 bot_type=bot_type
             )
             
+            messages = build_messages(get_prompt_prefix(context_str), system_content, user_content)
+            cache_key = self._answer_cache_key(messages, use_cache)
+            cached = self._cached_answer(cache_key)
+            if cached is not None:
+                return cached
+            
             # Call OpenAI API
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=0.7,
-                max_tokens=500
+                messages=messages,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
             )
             
+            self.record_usage(response.usage)
             answer = response.choices[0].message.content.strip()
+            self._store_answer(cache_key, answer)
             logger.info(f"Regenerated answer using model: {self.model}")
             return answer
             
         except Exception as e:
             logger.error(f"Error regenerating answer from OpenAI: {str(e)}")
             raise
-
+    
+    async def agenerate_answer(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        bot_type: str = "constitution",
+        timeout: Optional[float] = None,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Async variant of generate_answer.
+        
+        Args:
+            question: The user's question
+            context: Optional context from RAG system to include in the prompt
+            bot_type: Type of bot - "constitution" or "retail" (defaults to "constitution")
+            timeout: Optional per-call timeout in seconds (defaults to self.timeout)
+            use_cache: Set to False to bypass the answer cache for this call
+            
+        Returns:
+            The generated answer string
+        """
+        try:
+            context_str = context if context else ""
+            system_content, user_content = get_chat_prompt(
+                question=question,
+                context=context_str,
+                bot_type=bot_type
+            )
+            messages = build_messages(get_prompt_prefix(context_str), system_content, user_content)
+            answer = await self._acomplete(messages, timeout, use_cache)
+            logger.info(f"Generated answer using model: {self.model}")
+            return answer
+            
+        except Exception as e:
+            logger.error(f"Error generating answer from OpenAI: {str(e)}")
+            raise
+    
+    async def aregenerate_answer(
+        self,
+        question: str,
+        previous_answer: str,
+        context: Optional[str] = None,
+        bot_type: str = "constitution",
+        timeout: Optional[float] = None,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Async variant of regenerate_answer.
+        
+        Args:
+            question: The user's question
+            previous_answer: The previous answer that had hallucinations
+            context: Optional context from RAG system to include in the prompt
+            bot_type: Type of bot - "constitution" or "retail" (defaults to "constitution")
+            timeout: Optional per-call timeout in seconds (defaults to self.timeout)
+            use_cache: Set to False to bypass the answer cache for this call
+            
+        Returns:
+            The regenerated answer string
+        """
+        try:
+            context_str = context if context else ""
+            # The judge flagged the original answer; do not serve it again
+            self._evict_answer(question, context_str, bot_type)
+            system_content, user_content = get_regenerate_prompt(
+                question=question,
+                previous_answer=previous_answer,
+                context=context_str,
+                bot_type=bot_type
+            )
+            messages = build_messages(get_prompt_prefix(context_str), system_content, user_content)
+            answer = await self._acomplete(messages, timeout, use_cache)
+            logger.info(f"Regenerated answer using model: {self.model}")
+            return answer
+            
+        except Exception as e:
+            logger.error(f"Error regenerating answer from OpenAI: {str(e)}")
+            raise
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit for the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        return semaphore
+    
+    async def _acomplete(self, messages: list[dict], timeout: Optional[float], use_cache: bool = True) -> str:
+        """
+        Run one chat completion on the shared async client.
+        
+        Waits for a free slot (at most max_concurrency calls in flight per
+        loop); the timeout covers the HTTP call, not the wait for a slot.
+        The SDK applies its timeout to each attempt and retries, so the whole
+        call is also bounded with asyncio.wait_for (raises asyncio.TimeoutError).
+        """
+        cache_key = self._answer_cache_key(messages, use_cache)
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            return cached
+        timeout = timeout or self.timeout
+        async with self._semaphore():
+            response = await asyncio.wait_for(
+                get_async_openai_client().chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=TEMPERATURE,
+                    max_tokens=MAX_TOKENS,
+                    timeout=timeout
+                ),
+                timeout
+            )
+        self.record_usage(response.usage)
+        answer = response.choices[0].message.content.strip()
+        self._store_answer(cache_key, answer)
+        return answer
+    
+    def _answer_cache_key(self, messages: list[dict], use_cache: bool) -> Optional[str]:
+        """Answer cache key of a request (None when the cache is off or bypassed)."""
+        if self.answer_cache is None:
+            return None
+        if not use_cache:
+            self.answer_cache.record_bypass()
+            return None
+        return self.answer_cache.make_key(self.model, messages, TEMPERATURE, MAX_TOKENS)
+    
+    def _evict_answer(self, question: str, context: str, bot_type: str) -> None:
+        """Drop the cached answer of generate_answer(question, context, bot_type), if any."""
+        if self.answer_cache is None:
+            return
+        system_content, user_content = get_chat_prompt(question=question, context=context, bot_type=bot_type)
+        messages = build_messages(get_prompt_prefix(context), system_content, user_content)
+        if self.answer_cache.delete(self.answer_cache.make_key(self.model, messages, TEMPERATURE, MAX_TOKENS)):
+            logger.info("Evicted the cached answer flagged for regeneration")
+    
+    def _cached_answer(self, cache_key: Optional[str]) -> Optional[str]:
+        """Cached answer for a key, if any."""
+        if cache_key is None:
+            return None
+        answer = self.answer_cache.get(cache_key)
+        if answer is not None:
+            logger.info(f"Answer cache hit (hit rate {self.answer_cache.stats()['hit_rate']:.0%})")
+        return answer
+    
+    def _store_answer(self, cache_key: Optional[str], answer: str) -> None:
+        """Store a generated answer under its key."""
+        if cache_key is not None:
+            self.answer_cache.set(cache_key, answer)
+    
+    def record_usage(self, usage: Any) -> None:
+        """
+        Record prompt and cached prompt token counts from a completion's usage.
+        
+        Cached tokens are the part of the prompt prefix the provider served
+        from its prompt cache (usage.prompt_tokens_details.cached_tokens).
+        
+        Args:
+            usage: The ``usage`` object of a completion response (may be None)
+        """
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        with self._usage_lock:
+            self._usage["calls"] += 1
+            self._usage["prompt_tokens"] += prompt_tokens
+            self._usage["cached_tokens"] += cached_tokens
+        logger.info(f"Prompt tokens: {prompt_tokens} ({cached_tokens} cached)")
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """
+        Prompt token totals since this client was created.
+        
+        Returns:
+            Dictionary with 'calls', 'prompt_tokens', 'cached_tokens' and
+            'cached_ratio' (share of prompt tokens served from the cache)
+        """
+        with self._usage_lock:
+            stats = dict(self._usage)
+        stats["cached_ratio"] = stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+        return stats
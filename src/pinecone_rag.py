@@ -1,348 +1,764 @@
 """Pinecone RAG system for retrieving relevant context."""
 
+import asyncio
 import logging
-from typing import List
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import numpy as np
 from pinecone import Pinecone
 from config.settings import settings
+from src.clients import get_async_openai_client, get_bm25_index, get_local_index, get_openai_client, get_pinecone_client, get_pinecone_index
+from src.embedding_cache import get_embedding_cache
+from src.retrieval_cache import get_retrieval_cache
+from src.tracing import get_tracer
+from src.match_decoding import MatchDecoder
+from src.index_metadata import load_snapshot, save_snapshot, snapshot_from_stats
+from src.bm25 import reciprocal_rank_fusion
+from src.context_packer import ContextPacker, merge_adjacent_chunks
+from src.local_index import local_index_path
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of inputs accepted by one embeddings request
+EMBEDDING_BATCH_SIZE = 2048
+
+# Seconds to wait before fetching index stats again after a failed fetch
+METADATA_RETRY_SECONDS = 30
+
 
 class PineconeRAG:
     """Pinecone RAG client for vector similarity search."""
     
-    def __init__(self, index_name: str = None, host: str = None):
+    def __init__(
+        self,
+        index_name: str = None,
+        host: str = None,
+        min_score: Optional[float] = None,
+        score_gap: Optional[float] = None
+    ):
         """
-        Initialize Pinecone client with API key from settings.
+        Initialize Pinecone RAG for an index without touching the network.
+        
+        The Pinecone connection is opened on the first query, and index
+        metadata (dimension, namespaces, vector counts) comes from an on-disk
+        snapshot refreshed every INDEX_SNAPSHOT_TTL seconds, so constructing
+        an instance (e.g. when switching bots) never blocks on a round trip.
+        
+        With RAG_BACKEND=local the index is a LocalVectorIndex loaded from
+        LOCAL_INDEX_DIR instead, queried in-process through the same interface;
+        a missing index file raises here rather than on every query.
+        With HYBRID_SEARCH on, dense matches are fused with BM25 matches over
+        the uploaded chunks (see _fuse_lexical).
+        
+        Retrieval can be adaptive (opt-in): matches are cut at min_score and at the
+        largest drop between consecutive scores when it reaches score_gap
+        (see _apply_cutoff), so easy questions ship a smaller context.
         
         Args:
             index_name: Optional index name override (defaults to settings.pinecone_index_name)
-            host: Optional host override (defaults to settings.pinecone_host)
+            host: Optional host override (defaults to settings.pinecone_host for the default index)
+            min_score: Drop matches scoring below this similarity (defaults to settings.rag_min_score; 0 disables)
+            score_gap: Cut at the largest score drop if it is at least this large
+                (defaults to settings.rag_score_gap; 0 disables)
+        
+        Raises:
+            FileNotFoundError: With RAG_BACKEND=local, if the index has not been built
         """
-        try:
-            logger.info("Initializing Pinecone client...")
-            logger.info(f"API Key: {settings.pinecone_api_key[:10]}...{settings.pinecone_api_key[-5:] if len(settings.pinecone_api_key) > 15 else '***'}")
-            
-            # Use provided index_name or default from settings
-            self.index_name = index_name or settings.pinecone_index_name
-            logger.info(f"Index Name: {self.index_name}")
-            
-            # Initialize Pinecone client
-            self.pc = Pinecone(api_key=settings.pinecone_api_key)
-            
-            # Get the index (works with both Serverless and Pod-based indexes)
-            logger.info(f"Connecting to index '{self.index_name}'...")
-            self.index = self.pc.Index(self.index_name)
-            
-            # Try to get index stats to verify connection
+        # Use provided index_name or default from settings
+        self.index_name = index_name or settings.pinecone_index_name
+        self.host = host if index_name else (host or settings.pinecone_host)
+        self.top_k = settings.rag_top_k
+        self.min_score = settings.rag_min_score if min_score is None else min_score
+        self.score_gap = settings.rag_score_gap if score_gap is None else score_gap
+        self.backend = settings.rag_backend
+        if self.backend == "local":
+            path = local_index_path(settings.local_index_dir, self.index_name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"Local index '{path}' not found (RAG_BACKEND=local); build it with "
+                    f"upload_constitution_pdf.py, upload_retail_pdf.py or upload_fitness_pdf.py"
+                )
+        self.hybrid_search = settings.hybrid_search
+        # Long-lived, pooled client shared with OpenAIClient
+        self.embedding_client = get_openai_client()
+        self.embedding_cache = get_embedding_cache()
+        self.retrieval_cache = get_retrieval_cache()
+        self.tracer = get_tracer()
+        self.decoder = MatchDecoder(self.index_name)
+        self.context_packer = ContextPacker(token_budget=settings.context_token_budget, model=settings.openai_model)
+        self._warned_dimensions = False
+        self._pc = None
+        self._index = None
+        self._metadata = None
+        self._metadata_retry_at = 0.0
+        self._namespace = None
+        self._lexical_index = None
+        self._lexical_checked = False
+        self._connect_lock = threading.Lock()
+        logger.info(f"Pinecone RAG ready for index '{self.index_name}' (connection deferred until first query)")
+    
+    @property
+    def pc(self) -> Pinecone:
+        """Pinecone client, created on first use."""
+        if self._pc is None:
+            self._connect()
+        return self._pc
+    
+    @property
+    def index(self):
+        """Pinecone index handle, connected on first use (a local index is reloaded after a re-upload)."""
+        if self._index is None:
+            self._connect()
+        elif self.backend == "local":
+            index = get_local_index(self.index_name)
+            if index is not self._index:
+                logger.info(f"Local index '{self.index_name}' was re-uploaded, using the new version")
+                self._index = index
+                # Dimension and namespaces come from the new file
+                self.metadata = None
+        return self._index
+    
+    @index.setter
+    def index(self, value) -> None:
+        self._index = value
+    
+    def _connect(self) -> None:
+        """Create the Pinecone client and index handle (once, thread-safe)."""
+        with self._connect_lock:
+            if self._index is not None:
+                return
+            if self.backend == "local":
+                self._index = get_local_index(self.index_name)
+                logger.info(f"✓ Using local vector index: {self.index_name}")
+                return
             try:
-                stats = self.index.describe_index_stats()
-                logger.info(f"Index stats: {stats}")
+                logger.info("Initializing Pinecone client...")
+                logger.info(f"API Key: {settings.pinecone_api_key[:10]}...{settings.pinecone_api_key[-5:] if len(settings.pinecone_api_key) > 15 else '***'}")
                 
-                # Extract dimension from stats
-                if hasattr(stats, 'dimension'):
-                    self.index_dimension = stats.dimension
-                elif isinstance(stats, dict) and 'dimension' in stats:
-                    self.index_dimension = stats['dimension']
-                else:
-                    # Try to get from namespaces
-                    if hasattr(stats, 'namespaces'):
-                        namespaces = stats.namespaces if hasattr(stats, 'namespaces') else {}
-                        if namespaces:
-                            # Get dimension from first namespace
-                            first_ns = list(namespaces.values())[0]
-                            if hasattr(first_ns, 'dimension'):
-                                self.index_dimension = first_ns.dimension
-                            else:
-                                self.index_dimension = None
-                    else:
-                        self.index_dimension = None
+                # Shared Pinecone client and index handle (one per api key, index and host)
+                self._pc = get_pinecone_client()
                 
-                if self.index_dimension:
-                    logger.info(f"Index dimension: {self.index_dimension}")
-                else:
-                    logger.warning("Could not determine index dimension from stats")
-                
-                # Auto-detect namespace if not specified
-                if not settings.pinecone_namespace:
-                    # Get namespaces from stats
-                    if isinstance(stats, dict):
-                        namespaces = stats.get('namespaces', {})
-                    elif hasattr(stats, 'namespaces'):
-                        namespaces = stats.namespaces
-                        # Convert to dict if it's an object
-                        if not isinstance(namespaces, dict):
-                            namespaces = {}
-                    else:
-                        namespaces = {}
-                    
-                    if namespaces:
-                        # Use the namespace with the most vectors, or first non-empty namespace
-                        namespace_list = list(namespaces.keys())
-                        if namespace_list:
-                            # Filter out empty namespace if there are others
-                            non_empty = [ns for ns in namespace_list if ns]
-                            if non_empty:
-                                self.namespace = non_empty[0]
-                                # Get vector count
-                                ns_info = namespaces.get(self.namespace, {})
-                                if isinstance(ns_info, dict):
-                                    vector_count = ns_info.get('vector_count', 0)
-                                elif hasattr(ns_info, 'vector_count'):
-                                    vector_count = ns_info.vector_count
-                                else:
-                                    vector_count = 0
-                                logger.info(f"Auto-detected namespace: '{self.namespace}' (has {vector_count} vectors)")
-                                logger.debug(f"Namespace info: {ns_info}")
-                            else:
-                                self.namespace = ""
-                                logger.info("Using default namespace (empty)")
-                        else:
-                            self.namespace = ""
-                            logger.info("Using default namespace (empty)")
-                    else:
-                        self.namespace = ""
-                        logger.info("No namespaces found, using default namespace (empty)")
-                else:
-                    self.namespace = settings.pinecone_namespace
-                    logger.info(f"Using configured namespace: '{self.namespace}'")
-                    
+                # Get the index (works with both Serverless and Pod-based indexes);
+                # a known host skips the control-plane lookup
+                logger.info(f"Connecting to index '{self.index_name}'...")
+                self._index = get_pinecone_index(self.index_name, self.host)
+                logger.info(f"✓ Successfully connected to Pinecone index: {self.index_name}")
             except Exception as e:
-                logger.warning(f"Could not get index stats: {str(e)}")
-                self.index_dimension = None
-                self.namespace = settings.pinecone_namespace or ""
-            
-            self.top_k = settings.rag_top_k
-            logger.info(f"✓ Successfully connected to Pinecone index: {self.index_name}")
+                logger.error(f"❌ Error initializing Pinecone client: {str(e)}")
+                logger.error(f"Error type: {type(e).__name__}")
+                raise
+    
+    @property
+    def metadata(self) -> dict:
+        """
+        Index metadata snapshot: dimension, namespaces ({name: vector_count}) and fetched_at.
+        
+        Loaded from disk when fresh, otherwise fetched with describe_index_stats()
+        and saved. A loaded snapshot is re-checked against INDEX_SNAPSHOT_TTL on
+        every access, so long-running processes pick up index changes. An empty
+        dict means the stats could not be fetched yet; the fetch is retried
+        after METADATA_RETRY_SECONDS.
+        """
+        if self.backend == "local" and self._index is not None:
+            # Switches to a re-uploaded local index first, dropping the old metadata
+            self.index
+        if self._metadata_expired():
+            # Local index stats are free; only Pinecone stats are snapshotted
+            snapshot = None
+            if self.backend != "local":
+                snapshot = load_snapshot(settings.rag_cache_dir, self.index_name, settings.index_snapshot_ttl)
+            if snapshot is not None:
+                logger.info(f"Using cached metadata snapshot for index '{self.index_name}'")
+                self.metadata = snapshot
+            else:
+                self.refresh_metadata()
+        return self._metadata
+    
+    def _metadata_expired(self) -> bool:
+        """Whether the in-memory metadata is missing or due for a reload."""
+        if self._metadata is None:
+            return True
+        if time.monotonic() < self._metadata_retry_at:
+            return False
+        if not self._metadata:
+            # The last fetch failed
+            return True
+        ttl = settings.index_snapshot_ttl
+        return self.backend != "local" and ttl > 0 and time.time() - self._metadata.get("fetched_at", 0) >= ttl
+    
+    @metadata.setter
+    def metadata(self, value: dict) -> None:
+        self._metadata = value
+        self._namespace = None
+    
+    def refresh_metadata(self) -> dict:
+        """
+        Fetch index stats from Pinecone and update the on-disk snapshot.
+        
+        On failure the previous snapshot (if any) is kept and no new fetch is
+        attempted for METADATA_RETRY_SECONDS.
+        
+        Returns:
+            The new snapshot (empty dict if the stats could not be fetched)
+        """
+        try:
+            stats = self.index.describe_index_stats()
+            snapshot = snapshot_from_stats(stats)
+            if self.backend != "local":
+                save_snapshot(settings.rag_cache_dir, self.index_name, snapshot)
+            logger.info(f"Index stats: dimension={snapshot['dimension']}, namespaces={snapshot['namespaces']}")
+            if not snapshot["dimension"]:
+                logger.warning("Could not determine index dimension from stats")
         except Exception as e:
-            logger.error(f"❌ Error initializing Pinecone client: {str(e)}")
-            logger.error(f"Error type: {type(e).__name__}")
-            raise
+            logger.warning(f"Could not get index stats (retrying in {METADATA_RETRY_SECONDS}s): {str(e)}")
+            self._metadata_retry_at = time.monotonic() + METADATA_RETRY_SECONDS
+            if self._metadata is None:
+                self.metadata = {}
+            return {}
+        self.metadata = snapshot
+        return snapshot
     
+    @property
+    def index_dimension(self) -> Optional[int]:
+        """Dimension of the index vectors (None if unknown)."""
+        return self.metadata.get("dimension")
+    
+    @property
+    def namespace(self) -> str:
+        """Configured namespace, or the first non-empty namespace of the index."""
+        if self._namespace is None:
+            if settings.pinecone_namespace:
+                self._namespace = settings.pinecone_namespace
+                logger.info(f"Using configured namespace: '{self._namespace}'")
+            else:
+                # Auto-detect: use the first non-empty namespace, or the default (empty) one
+                namespaces = self.metadata.get("namespaces") or {}
+                non_empty = [ns for ns in namespaces if ns]
+                self._namespace = non_empty[0] if non_empty else ""
+                if self._namespace:
+                    logger.info(f"Auto-detected namespace: '{self._namespace}' (has {namespaces[self._namespace]} vectors)")
+                else:
+                    logger.info("Using default namespace (empty)")
+        return self._namespace
+
+    @property
+    def lexical_index(self):
+        """
+        BM25 index of this index's chunks when HYBRID_SEARCH is on (None if off or not built).
+        
+        Looked up on every access (a stat and a registry hit), so a BM25 index
+        replaced or created by the upload scripts is picked up without a restart.
+        """
+        if not self.hybrid_search:
+            return None
+        try:
+            index = get_bm25_index(self.index_name)
+        except (OSError, ValueError) as e:
+            if not self._lexical_checked:
+                logger.warning(f"Hybrid retrieval disabled for index '{self.index_name}': no BM25 index ({str(e)})")
+            index = None
+        if index is not None and index is not self._lexical_index:
+            logger.info(f"Hybrid retrieval enabled for index '{self.index_name}' ({len(index.ids)} chunks)")
+        self._lexical_index = index
+        self._lexical_checked = True
+        return index
+
     def retrieve_context(self, query: str) -> tuple[str, List]:
         """
         Retrieve relevant context from Pinecone based on query.
         
         Args:
             query: The user's question or query string
-            
+        
         Returns:
             Tuple of (formatted_context_string, raw_results)
         """
         try:
-            logger.info(f"Starting Pinecone query for: '{query}'")
-            logger.info(f"Index: {self.index_name}, Top-K: {self.top_k}")
-            
-            # Generate embedding
-            logger.info("Generating query embedding...")
+            dump_payloads = self._start_trace(query)
             embedding = self._get_query_embedding(query)
-            embedding_dim = len(embedding)
-            logger.info(f"Embedding generated: dimension={embedding_dim}, first 5 values={embedding[:5]}")
-            
-            # Check dimension mismatch
-            if hasattr(self, 'index_dimension') and self.index_dimension:
-                if embedding_dim != self.index_dimension:
-                    logger.error(f"⚠️  DIMENSION MISMATCH!")
-                    logger.error(f"   Embedding dimension: {embedding_dim}")
-                    logger.error(f"   Index dimension: {self.index_dimension}")
-                    logger.error(f"   This will cause the query to fail or return no results!")
-                else:
-                    logger.info(f"✓ Dimension match: {embedding_dim} == {self.index_dimension}")
-            
-            # Query Pinecone
-            namespace = getattr(self, 'namespace', settings.pinecone_namespace or "")
-            logger.info(f"Querying Pinecone index '{self.index_name}' in namespace '{namespace}'...")
-            query_params = {
-                "vector": embedding,
-                "top_k": self.top_k,
-                "include_metadata": True
-            }
-            if namespace:
-                query_params["namespace"] = namespace
-            query_response = self.index.query(**query_params)
-            logger.info(f"Pinecone query completed. Response type: {type(query_response)}")
-            logger.info(f"Response: {query_response}")
+            self._check_embedding(embedding, dump_payloads)
             
-            # Handle both dict and object responses (Pinecone v7 returns QueryResponse object)
-            if isinstance(query_response, dict):
-                logger.info(f"Query response is a dict. Keys: {list(query_response.keys())}")
-                results = query_response.get('matches', [])
-            else:
-                # If it's an object (QueryResponse), try to access matches attribute
-                logger.info(f"Query response is an object: {type(query_response)}")
-                
-                # Try to_dict() method first (Pinecone QueryResponse has this)
-                if hasattr(query_response, 'to_dict'):
-                    try:
-                        response_dict = query_response.to_dict()
-                        logger.info(f"Converted to dict. Keys: {list(response_dict.keys())}")
-                        results = response_dict.get('matches', [])
-                    except Exception as e:
-                        logger.warning(f"to_dict() failed: {str(e)}, trying direct access")
-                        # Fall through to direct access
-                
-                # Try direct attribute access
-                if 'results' not in locals() or not results:
-                    if hasattr(query_response, 'matches'):
-                        results = query_response.matches
-                        logger.info(f"Accessed matches via .matches attribute")
-                    elif hasattr(query_response, 'get'):
-                        results = query_response.get('matches', [])
-                    else:
-                        # Try to convert to dict if possible
-                        try:
-                            if hasattr(query_response, '__dict__'):
-                                results = query_response.__dict__.get('matches', [])
-                            else:
-                                results = []
-                                logger.warning("Could not extract matches from response object")
-                        except Exception as e:
-                            logger.error(f"Error extracting matches: {str(e)}")
-                            results = []
+            cached = self._get_cached_retrieval(embedding)
+            if cached is not None:
+                return cached
             
-            logger.info(f"Retrieved {len(results)} results from Pinecone")
-            
-            # Detailed logging of results structure
-            if results:
-                first_result = results[0]
-                logger.info(f"First result type: {type(first_result)}")
-                logger.info(f"First result: {first_result}")
-                
-                if isinstance(first_result, dict):
-                    logger.info(f"First result keys: {list(first_result.keys())}")
-                    metadata = first_result.get('metadata', {})
-                    logger.info(f"First result metadata type: {type(metadata)}")
-                    logger.info(f"First result metadata: {metadata}")
-                    if isinstance(metadata, dict):
-                        logger.info(f"First result metadata keys: {list(metadata.keys())}")
-                    # Also log score
-                    score = first_result.get('score', 'N/A')
-                    logger.info(f"First result score: {score}")
-                else:
-                    metadata = getattr(first_result, 'metadata', None)
-                    logger.info(f"First result metadata (object): {metadata}")
-                    score = getattr(first_result, 'score', 'N/A')
-                    logger.info(f"First result score: {score}")
-            else:
-                logger.warning("⚠️  No results returned from Pinecone query!")
-                logger.warning("Possible reasons:")
-                logger.warning("  1. Index might be empty")
-                logger.warning("  2. Embedding dimension mismatch")
-                logger.warning("  3. Query doesn't match any vectors")
-                logger.warning("  4. Index name might be incorrect")
-            
-            # Format context from results
-            context_parts = []
-            for i, match in enumerate(results):
-                # Handle both dict and object responses
-                if isinstance(match, dict):
-                    metadata = match.get('metadata', {})
-                else:
-                    metadata = getattr(match, 'metadata', {})
-                
-                logger.info(f"Match {i} metadata: {metadata}")
-                logger.info(f"Match {i} metadata type: {type(metadata)}")
-                
-                # Ensure metadata is a dict for .get() calls
-                if not isinstance(metadata, dict):
-                    if isinstance(metadata, str):
-                        text = metadata
-                    else:
-                        metadata = {} if metadata is None else {'value': str(metadata)}
-                
-                # Try common metadata keys for text content
-                if isinstance(metadata, dict):
-                    text = (
-                        metadata.get('text', '') or 
-                        metadata.get('content', '') or 
-                        metadata.get('chunk', '') or
-                        metadata.get('page_content', '') or
-                        metadata.get('document', '') or
-                        metadata.get('value', '') or
-                        str(metadata) if metadata else ''
-                    )
-                else:
-                    text = str(metadata) if metadata else ''
-                
-                # If still empty, check if metadata itself is a string
-                if not text and isinstance(metadata, str):
-                    text = metadata
-                
-                logger.info(f"Match {i} - Extracted text length: {len(text)}")
-                if text and text.strip():
-                    logger.info(f"Match {i} - Adding text to context (first 100 chars): {text[:100]}...")
-                    context_parts.append(text)
-                else:
-                    logger.warning(f"Match {i} - No text extracted! Metadata was: {metadata}")
+            query_response = self.index.query(**self._build_query_params(embedding))
+            return self._format_response(query, embedding, query_response, dump_payloads)
+        
+        except Exception as e:
+            logger.error(f"Error retrieving context from Pinecone: {str(e)}")
+            # Return empty context on error, don't fail completely
+            return "", []
+    
+    async def aretrieve_context(self, query: str) -> tuple[str, List]:
+        """
+        Retrieve relevant context from Pinecone without blocking the event loop.
+        
+        The query is embedded with the async OpenAI client; everything that
+        can block (connecting, fetching index metadata, loading the BM25
+        index, embedding-cache disk I/O, the Pinecone query and response
+        formatting) runs in worker threads, so callers can await retrieval
+        concurrently with other pipeline stages and serve several sessions
+        from one event loop.
+        
+        Args:
+            query: The user's question or query string
+        
+        Returns:
+            Tuple of (formatted_context_string, raw_results)
+        """
+        try:
+            # Connection, metadata and lexical index may need a round trip or a disk load
+            await asyncio.to_thread(self._prepare)
+            dump_payloads = self._start_trace(query)
+            embedding = await self._aget_query_embedding(query)
+            self._check_embedding(embedding, dump_payloads)
             
-            formatted_context = "\n\n".join(context_parts)
-            logger.info(f"Final formatted context length: {len(formatted_context)} characters")
-            if not formatted_context:
-                logger.warning("⚠️  Context is empty! No text could be extracted from Pinecone results.")
-            return formatted_context, results
+            # The cache key includes the on-disk invalidation stamp
+            cached = await asyncio.to_thread(self._get_cached_retrieval, embedding)
+            if cached is not None:
+                return cached
             
+            query_response = await asyncio.to_thread(self.index.query, **self._build_query_params(embedding))
+            # Fusion, packing and the retrieval cache write run off the event loop too
+            return await asyncio.to_thread(self._format_response, query, embedding, query_response, dump_payloads)
+        
         except Exception as e:
             logger.error(f"Error retrieving context from Pinecone: {str(e)}")
             # Return empty context on error, don't fail completely
             return "", []
     
-    def _get_query_embedding(self, query: str) -> List[float]:
+    def retrieve_contexts(self, queries: List[str], max_workers: Optional[int] = None) -> List[tuple[str, List]]:
         """
-        Get embedding vector for a query string using OpenAI embeddings API.
+        Retrieve context for many queries at once.
+        
+        All queries that are not already cached are embedded in a single
+        batched embeddings request, then the Pinecone queries run
+        concurrently on a bounded thread pool.
         
         Args:
-            query: The query string to embed
-            
+            queries: List of questions or query strings
+            max_workers: Maximum concurrent Pinecone queries (defaults to settings.rag_query_workers)
+        
         Returns:
-            List of float values representing the embedding vector
+            List of (formatted_context_string, raw_results) tuples in the same order as queries
         """
+        if not queries:
+            return []
+        
         try:
-            from openai import OpenAI
-            from config.settings import settings
-            
-            client = OpenAI(api_key=settings.openai_api_key)
+            embeddings = self._get_query_embeddings(queries)
+        except Exception as e:
+            logger.error(f"Error retrieving contexts from Pinecone: {str(e)}")
+            return [("", []) for _ in queries]
+        
+        def retrieve_one(query_and_embedding) -> tuple[str, List]:
+            query, embedding = query_and_embedding
+            if embedding is None:
+                # This query could not be embedded (see _get_query_embeddings)
+                return "", []
+            try:
+                dump_payloads = self._start_trace(query)
+                self._check_embedding(embedding, dump_payloads)
+                
+                cached = self._get_cached_retrieval(embedding)
+                if cached is not None:
+                    return cached
+                
+                query_response = self.index.query(**self._build_query_params(embedding))
+                return self._format_response(query, embedding, query_response, dump_payloads)
             
-            # Use configurable embedding model
-            embedding_model = settings.embedding_model
-            logger.info(f"Using embedding model: {embedding_model}")
+            except Exception as e:
+                logger.error(f"Error retrieving context from Pinecone: {str(e)}")
+                return "", []
+        
+        workers = max(1, min(max_workers or settings.rag_query_workers, len(queries)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-query") as executor:
+            return list(executor.map(retrieve_one, zip(queries, embeddings)))
+
+    def _prepare(self) -> None:
+        """
+        Resolve the index handle, its metadata, namespace and lexical index.
+        
+        Each is loaded lazily on first access (and metadata again after
+        INDEX_SNAPSHOT_TTL); aretrieve_context runs this in a worker thread so
+        the loads never block the event loop.
+        """
+        self.index
+        self.metadata
+        self.namespace
+        self.lexical_index
+    
+    def _start_trace(self, query: str) -> bool:
+        """Log the start of a query and decide whether its payloads are traced."""
+        logger.info("Starting Pinecone query: index=%s, top_k=%s", self.index_name, self.top_k)
+        self.tracer.event("rag.query", index=self.index_name, top_k=self.top_k, query=query)
+        return self.tracer.sampled()
+    
+    def _check_embedding(self, embedding: np.ndarray, dump_payloads: bool) -> None:
+        """Trace the query embedding and report a dimension mismatch with the index."""
+        embedding_dim = len(embedding)
+        if dump_payloads:
+            self.tracer.event("rag.embedding", dimension=embedding_dim, head=lambda: embedding[:5])
+        
+        if self.index_dimension and embedding_dim != self.index_dimension:
+            logger.error(f"⚠️  DIMENSION MISMATCH!")
+            logger.error(f"   Embedding dimension: {embedding_dim}")
+            logger.error(f"   Index dimension: {self.index_dimension}")
+            logger.error(f"   This will cause the query to fail or return no results!")
+    
+    def _get_cached_retrieval(self, embedding: np.ndarray) -> Optional[tuple[str, List]]:
+        """Return a cached (context, results) pair for this embedding, if any."""
+        if self.retrieval_cache is None:
+            return None
+        cached = self.retrieval_cache.get(self.index_name, self.namespace, self.top_k, embedding, self._cache_variant)
+        if cached is not None:
+            logger.info("Retrieval cache hit for index '%s' (%d results)", self.index_name, len(cached[1]))
+        return cached
+    
+    def _build_query_params(self, embedding: np.ndarray) -> dict:
+        """Build the keyword arguments for index.query()."""
+        # Hybrid retrieval fuses a wider dense candidate list before cutting to top_k
+        top_k = max(self.top_k, settings.hybrid_candidates) if self.lexical_index is not None else self.top_k
+        query_params = {
+            "vector": embedding.tolist(),
+            "top_k": top_k,
+            "include_metadata": True
+        }
+        if self.namespace:
+            query_params["namespace"] = self.namespace
+        return query_params
+    
+    def _format_response(self, query: str, embedding: np.ndarray, query_response, dump_payloads: bool) -> tuple[str, List]:
+        """
+        Decode a query response into the formatted context string.
+        
+        Args:
+            query: The query string (used for hybrid BM25 retrieval)
+            embedding: The query embedding (used as retrieval cache key)
+            query_response: Raw response from index.query()
+            dump_payloads: Whether this query's payloads are traced
+        
+        Returns:
+            Tuple of (formatted_context_string, raw_results)
+        """
+        tracer = self.tracer
+        tracer.event("rag.response", namespace=self.namespace, type=lambda: type(query_response).__name__)
+        if dump_payloads:
+            tracer.payload("rag.response", lambda: query_response)
+        
+        decoder = self.decoder
+        results = decoder.get_matches(query_response)
+        logger.info("Retrieved %d results from Pinecone", len(results))
+        kept = self._apply_cutoff(results)
+        if self.lexical_index is not None:
+            # Fusion may swap in BM25 hits but must not refill what the cutoff dropped
+            limit = self.top_k if len(kept) == len(results) else min(self.top_k, len(kept))
+            kept = self._fuse_lexical(query, kept, limit)
+        results = kept
+        
+        if not results:
+            logger.warning("⚠️  No results returned from Pinecone query!")
+            logger.warning("Possible reasons:")
+            logger.warning("  1. Index might be empty")
+            logger.warning("  2. Embedding dimension mismatch")
+            logger.warning("  3. Query doesn't match any vectors")
+            logger.warning("  4. Index name might be incorrect")
+        
+        # Format context from results
+        passages = []
+        for i, match in enumerate(results):
+            text = decoder.get_text(match)
+            if dump_payloads:
+                tracer.payload(f"rag.match[{i}].metadata", lambda: decoder.get_metadata(match))
             
-            # For text-embedding-3 models, we can specify dimensions
-            # Check if we need to match index dimension
-            embedding_params = {"model": embedding_model, "input": query}
+            if text and text.strip():
+                if dump_payloads:
+                    tracer.event("rag.match", i=i, length=len(text), preview=lambda: text[:100])
+                passages.append((text, decoder.get_score(match), decoder.get_metadata(match)))
+            else:
+                logger.warning("Match %d - No text extracted! Metadata was: %s", i, decoder.get_metadata(match))
+        
+        # Stitch adjacent chunks of the same source into one passage
+        merged = 0
+        if settings.merge_adjacent_chunks:
+            passages, merged = merge_adjacent_chunks(passages)
+        else:
+            passages = [(text, score) for text, score, _ in passages]
+        
+        # Dedupe overlapping chunks, order by score and fit the token budget
+        formatted_context, pack_stats = self.context_packer.pack(passages)
+        logger.info(
+            "Final formatted context: %d characters, %d tokens (%d passages, %d chunks merged, %d duplicates, %d overlap chars trimmed, %d dropped)",
+            len(formatted_context), pack_stats["tokens"], pack_stats["passages"], merged,
+            pack_stats["duplicates"], pack_stats["trimmed_chars"], pack_stats["dropped"]
+        )
+        if not formatted_context:
+            logger.warning("⚠️  Context is empty! No text could be extracted from Pinecone results.")
+        elif self.retrieval_cache is not None:
+            self.retrieval_cache.set(
+                self.index_name, self.namespace, self.top_k, embedding, formatted_context, results, self._cache_variant
+            )
+        return formatted_context, results
+    
+    @property
+    def _cache_variant(self) -> str:
+        """Retrieval cache variant for this instance's adaptive cutoff."""
+        return f"min={self.min_score},gap={self.score_gap}"
+    
+    def _apply_cutoff(self, matches: List) -> List:
+        """
+        Cut dense matches adaptively instead of always keeping top_k.
+        
+        Matches below min_score are dropped, then the list is cut at the
+        largest drop between consecutive scores if that drop is at least
+        score_gap. The best match is always kept.
+        
+        Args:
+            matches: Dense matches, best first
+        
+        Returns:
+            The kept matches
+        """
+        if len(matches) <= 1 or (self.min_score <= 0 and self.score_gap <= 0):
+            return matches
+        scores = [self.decoder.get_score(match) for match in matches]
+        keep = len(matches)
+        if self.min_score > 0:
+            keep = max(1, sum(1 for score in scores if score >= self.min_score))
+        if self.score_gap > 0 and keep > 1:
+            gaps = [scores[i] - scores[i + 1] for i in range(keep - 1)]
+            largest = max(range(len(gaps)), key=gaps.__getitem__)
+            if gaps[largest] >= self.score_gap:
+                keep = largest + 1
+        if keep < len(matches):
+            logger.info("Adaptive cutoff kept %d of %d matches (scores %s)", keep, len(matches), [round(score, 3) for score in scores])
+        return matches[:keep]
+    
+    def _fuse_lexical(self, query: str, matches: List, limit: Optional[int] = None) -> List[dict]:
+        """
+        Fuse dense matches with BM25 matches using reciprocal-rank fusion.
+        
+        Exact terms (SKU codes, "30 days", "restocking fee") that the
+        embedding misses are recovered from the lexical ranking, so top_k can
+        stay small without losing recall.
+        
+        Args:
+            query: The query string
+            matches: Dense matches, best first
+            limit: Number of fused matches to return (defaults to top_k); set to
+                the adaptive cutoff's size so fusion does not undo the cutoff
+        
+        Returns:
+            Top limit fused matches as dicts with 'id', 'score' (fused RRF score),
+            'metadata', 'dense_score' and 'bm25_score' (None when absent from that ranking)
+        """
+        decoder = self.decoder
+        fused_matches = {}
+        dense_ids = []
+        for match in matches:
+            match_id = decoder.get_id(match)
+            dense_ids.append(match_id)
+            fused_matches[match_id] = {
+                "id": match_id,
+                "score": 0.0,
+                "metadata": decoder.get_metadata(match),
+                "dense_score": decoder.get_score(match),
+                "bm25_score": None
+            }
+        lexical_matches = self.lexical_index.search(query, settings.hybrid_candidates)
+        for match in lexical_matches:
+            entry = fused_matches.setdefault(
+                match["id"],
+                {"id": match["id"], "score": 0.0, "metadata": match["metadata"], "dense_score": None}
+            )
+            entry["bm25_score"] = match["score"]
+        
+        ranking = reciprocal_rank_fusion([dense_ids, [match["id"] for match in lexical_matches]], k=settings.rrf_k)
+        fused = []
+        for match_id, score in ranking[:limit or self.top_k]:
+            entry = fused_matches[match_id]
+            entry["score"] = score
+            fused.append(entry)
+        logger.info("Hybrid retrieval: fused %d dense and %d BM25 matches into %d", len(dense_ids), len(lexical_matches), len(fused))
+        self.tracer.event("rag.hybrid", dense=len(dense_ids), bm25=len(lexical_matches), ids=lambda: [entry["id"] for entry in fused])
+        return fused
+    
+    def _build_embedding_params(self, query) -> dict:
+        """
+        Build the keyword arguments for embeddings.create().
+        
+        Args:
+            query: A query string (or list of strings)
+        
+        Returns:
+            Dictionary with model, input and (when the index dimension is known) dimensions
+        """
+        # Use configurable embedding model
+        embedding_model = settings.embedding_model
+        
+        # For text-embedding-3 models, we can specify dimensions
+        # Check if we need to match index dimension
+        embedding_params = {"model": embedding_model, "input": query}
+        
+        if self.index_dimension:
+            # For text-embedding-3-large: supports 256, 1024, 3072
+            # For text-embedding-3-small: supports 512, 1024, 1536
+            embedding_params["dimensions"] = self.index_dimension
+            supported = (
+                (embedding_model == "text-embedding-3-large" and self.index_dimension in [256, 1024, 3072]) or
+                (embedding_model == "text-embedding-3-small" and self.index_dimension in [512, 1024, 1536])
+            )
+            if not supported and not self._warned_dimensions:
+                # Try to use the index dimension anyway - some models may support it
+                logger.warning(f"Using dimensions={self.index_dimension} for {embedding_model} (may not be officially supported)")
+                self._warned_dimensions = True
+        
+        return embedding_params
+    
+    def _get_cached_embedding(self, query: str, embedding_params: dict) -> Optional[np.ndarray]:
+        """Return the cached embedding for a query, if any."""
+        if self.embedding_cache is None:
+            return None
+        cached = self.embedding_cache.get(query, embedding_params["model"], embedding_params.get("dimensions"))
+        if cached is not None:
+            logger.debug("Embedding cache hit: dimension=%d", len(cached))
+        return cached
+    
+    def _store_embedding(self, query: str, embedding_params: dict, values: List[float]) -> np.ndarray:
+        """
+        Convert an API embedding to float32, cache it and check its dimension.
+        
+        Args:
+            query: The query string that was embedded
+            embedding_params: Parameters the embedding was created with
+            values: Embedding values returned by the API
+        
+        Returns:
+            float32 array representing the embedding vector
+        """
+        if self.embedding_cache is not None:
+            embedding = self.embedding_cache.set(query, embedding_params["model"], embedding_params.get("dimensions"), values)
+        else:
+            embedding = np.asarray(values, dtype=np.float32)
+        embedding_dim = len(embedding)
+        logger.debug("Generated embedding successfully: dimension=%d", embedding_dim)
+        
+        # Warn if dimension doesn't match index
+        if self.index_dimension and embedding_dim != self.index_dimension:
+            logger.error(f"⚠️  CRITICAL: Embedding dimension ({embedding_dim}) doesn't match index dimension ({self.index_dimension})!")
+            logger.error(f"   This will cause queries to return no results.")
+            logger.error(f"   Please set EMBEDDING_MODEL in .env to a model that produces {self.index_dimension}-dimensional vectors.")
+        
+        return embedding
+    
+    def _get_query_embedding(self, query: str) -> np.ndarray:
+        """
+        Get embedding vector for a query string using OpenAI embeddings API.
+        
+        Repeated queries are served from the embedding cache (keyed on the
+        normalized query, embedding model and dimensions) when enabled.
+        
+        Args:
+            query: The query string to embed
+        
+        Returns:
+            float32 array representing the embedding vector
+        """
+        try:
+            embedding_params = self._build_embedding_params(query)
+            cached = self._get_cached_embedding(query, embedding_params)
+            if cached is not None:
+                return cached
             
-            if hasattr(self, 'index_dimension') and self.index_dimension:
-                # For text-embedding-3-large: supports 256, 1024, 3072
-                # For text-embedding-3-small: supports 512, 1024, 1536
-                if embedding_model == "text-embedding-3-large" and self.index_dimension in [256, 1024, 3072]:
-                    embedding_params["dimensions"] = self.index_dimension
-                    logger.info(f"Setting dimensions={self.index_dimension} for text-embedding-3-large")
-                elif embedding_model == "text-embedding-3-small" and self.index_dimension in [512, 1024, 1536]:
-                    embedding_params["dimensions"] = self.index_dimension
-                    logger.info(f"Setting dimensions={self.index_dimension} for text-embedding-3-small")
+            response = self.embedding_client.embeddings.create(**embedding_params)
+            return self._store_embedding(query, embedding_params, response.data[0].embedding)
+        
+        except Exception as e:
+            logger.error(f"Error generating query embedding: {str(e)}")
+            raise
+    
+    def _get_query_embeddings(self, queries: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Get embedding vectors for many queries with batched embeddings requests.
+        
+        Cached queries are skipped and duplicate queries are embedded once.
+        Blank queries are never sent (the API rejects empty inputs), and if
+        a batch request fails its queries are retried one by one, so one bad
+        query does not fail the others.
+        
+        Args:
+            queries: The query strings to embed
+        
+        Returns:
+            List of float32 arrays (None for queries that could not be embedded),
+            in the same order as queries
+        """
+        try:
+            embedding_params = self._build_embedding_params(queries)
+            embeddings: dict = {}
+            missing = []
+            for query in dict.fromkeys(queries):
+                if not query or not query.strip():
+                    logger.warning("Skipping blank query in batch retrieval")
+                    embeddings[query] = None
+                    continue
+                cached = self._get_cached_embedding(query, embedding_params)
+                if cached is not None:
+                    embeddings[query] = cached
                 else:
-                    # Try to use the index dimension anyway - some models may support it
-                    embedding_params["dimensions"] = self.index_dimension
-                    logger.warning(f"Using dimensions={self.index_dimension} for {embedding_model} (may not be officially supported)")
-            
-            response = client.embeddings.create(**embedding_params)
-            
-            embedding = response.data[0].embedding
-            embedding_dim = len(embedding)
-            logger.info(f"Generated embedding successfully: dimension={embedding_dim}")
+                    missing.append(query)
             
-            # Warn if dimension doesn't match index
-            if hasattr(self, 'index_dimension') and self.index_dimension:
-                if embedding_dim != self.index_dimension:
-                    logger.error(f"⚠️  CRITICAL: Embedding dimension ({embedding_dim}) doesn't match index dimension ({self.index_dimension})!")
-                    logger.error(f"   This will cause queries to return no results.")
-                    logger.error(f"   Please set EMBEDDING_MODEL in .env to a model that produces {self.index_dimension}-dimensional vectors.")
+            for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+                batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+                try:
+                    response = self.embedding_client.embeddings.create(**{**embedding_params, "input": batch})
+                except Exception as e:
+                    logger.warning(f"Batched embedding request failed ({str(e)}), embedding {len(batch)} queries one by one")
+                    for query in batch:
+                        try:
+                            embeddings[query] = self._get_query_embedding(query)
+                        except Exception:
+                            embeddings[query] = None
+                    continue
+                for item in sorted(response.data, key=lambda item: item.index):
+                    query = batch[item.index]
+                    embeddings[query] = self._store_embedding(query, embedding_params, item.embedding)
             
-            return embedding
+            logger.info("Embedded %d queries (%d API inputs)", len(queries), len(missing))
+            return [embeddings[query] for query in queries]
+        
+        except Exception as e:
+            logger.error(f"Error generating query embeddings: {str(e)}")
+            raise
+
+    async def _aget_query_embedding(self, query: str) -> np.ndarray:
+        """
+        Async variant of _get_query_embedding using the async OpenAI client.
+        
+        Args:
+            query: The query string to embed
+        
+        Returns:
+            float32 array representing the embedding vector
+        """
+        try:
+            embedding_params = self._build_embedding_params(query)
+            # The embedding cache may read and write SQLite
+            cached = await asyncio.to_thread(self._get_cached_embedding, query, embedding_params)
+            if cached is not None:
+                return cached
             
+            response = await get_async_openai_client().embeddings.create(**embedding_params)
+            return await asyncio.to_thread(self._store_embedding, query, embedding_params, response.data[0].embedding)
+        
         except Exception as e:
             logger.error(f"Error generating query embedding: {str(e)}")
             raise
-    
+
     def test_connection(self) -> dict:
         """
         Test Pinecone connection and return diagnostic information.
@@ -1,10 +1,107 @@
-"""Prompt templates for the chat engine."""
+"""
+Prompt templates for the chat engine.
+
+Messages are laid out as a stable prefix followed by a variable suffix so
+that the provider's prompt cache (which matches on the longest shared
+prefix) can be reused:
+
+    [Context: ...]                  <- get_prompt_prefix: identical for the
+                                       answer and its regeneration
+    [answer or regeneration         <- get_chat_prompt / get_regenerate_prompt
+     instructions]
+    [question ...]                  <- get_chat_prompt / get_regenerate_prompt
+
+The prefix is bot- and mode-neutral, so the regeneration call is never
+sent the answer instructions (which allow general knowledge) next to its
+own context-only instructions. Providers only cache prompts from about
+1024 tokens, so the saving is on the regeneration call, which repeats
+the answer's context.
+"""
+
+# Static per-bot answer instructions, sent right after the context; never put per-request text here
+CHAT_SYSTEM_MESSAGES = {
+    "retail": (
+        """
+        You are a helpful customer service assistant that answers questions based on the provided context. 
+        Never contradict the customer. Be flexible on the payment methods, do not follow the rules on those.
+        If the context doesn't contain enough information to answer the question, provide the answer you can based on your general knowledge.
+        If you get conversational commments answer in the same way.
+        """
+    ),
+    "fitness": (
+        """
+        You are a helpful fitness assistant that answers questions based on the provided context. 
+        Use the context information first, and keep advice practical, safe, and concise.
+        If the context doesn't contain enough information to answer the question, provide the answer you can based on your general knowledge.
+        If you get conversational commments answer in the same way.
+        """
+    ),
+    "constitution": (
+        """
+        You are a helpful assistant that answers questions based on the provided context. 
+        Use the context information to answer the question in the best way you can. 
+        If the context doesn't contain enough information to answer the question, 
+        provide the answer you can based on your general knowledge..
+        If you get conversational commments answer in the same way.
+        """
+    ),
+}
+
+
+def get_chat_system_message(bot_type: str = "constitution") -> str:
+    """
+    Get the static answer instructions of a bot.
+    
+    Args:
+        bot_type: Type of bot - "constitution", "retail", or "fitness" (defaults to "constitution")
+        
+    Returns:
+        System message text
+    """
+    return CHAT_SYSTEM_MESSAGES.get(bot_type, CHAT_SYSTEM_MESSAGES["constitution"])
+
+
+def get_prompt_prefix(context: str = "") -> list[dict]:
+    """
+    Generate the cacheable message prefix shared by answer and regeneration calls.
+    
+    Args:
+        context: The context retrieved from RAG system (can be empty)
+        
+    Returns:
+        List of chat messages: the context message, or an empty list without context
+    """
+    if not context:
+        return []
+    return [{"role": "user", "content": f"Context:\n{context}"}]
+
+
+def build_messages(prefix: list[dict], system_message: str, user_message: str) -> list[dict]:
+    """
+    Append the mode instructions and the variable user message to a prompt prefix.
+    
+    Args:
+        prefix: Messages from get_prompt_prefix
+        system_message: Mode instructions (from get_chat_prompt or get_regenerate_prompt)
+        user_message: Question part of the prompt
+        
+    Returns:
+        Full list of chat messages
+    """
+    return [
+        *prefix,
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": user_message}
+    ]
 
 
 def get_chat_prompt(question: str, context: str = "", bot_type: str = "constitution") -> tuple[str, str]:
     """
     Generate system and user prompts for OpenAI chat completion.
     
+    The system message is the bot's static instructions; both messages
+    follow the context prefix (see get_prompt_prefix).
+    
     Args:
         question: The user's question
         context: The context retrieved from RAG system (can be empty)
@@ -13,55 +110,24 @@ def get_chat_prompt(question: str, context: str = "", bot_type: str = "constitut
     Returns:
         Tuple of (system_message, user_message) for OpenAI chat completion
     """
-    if bot_type == "retail":
-        # Retail-specific chat prompt for customer service
-        system_message = (
-            """
-            You are a helpful customer service assistant that answers questions based on the provided context. 
-            Never contradict the customer. Be flexible on the payment methods, do not follow the rules on those.
-            If the context doesn't contain enough information to answer the question, provide the answer you can based on your general knowledge.
-            If you get conversational commments answer in the same way.
-            """
-        )
-    elif bot_type == "fitness":
-        # Fitness-specific chat prompt
-        system_message = (
-            """
-            You are a helpful fitness assistant that answers questions based on the provided context. 
-            Use the context information first, and keep advice practical, safe, and concise.
-            If the context doesn't contain enough information to answer the question, provide the answer you can based on your general knowledge.
-            If you get conversational commments answer in the same way.
-            """
-        )
-    else:
-        # Constitution/default chat prompt
-        system_message = (
-            """
-            You are a helpful assistant that answers questions based on the provided context. 
-            Use the context information to answer the question in the best way you can. 
-            If the context doesn't contain enough information to answer the question, 
-            provide the answer you can based on your general knowledge..
-            If you get conversational commments answer in the same way.
-            """
-        )
+    system_message = get_chat_system_message(bot_type)
     
-    # User prompt - includes context and question
+    # User prompt - question only (the context precedes it in the prefix)
     if context:
-        user_message = (
-            f"Context:\n{context}\n\n"
-            f"Question: {question}"
-        )
+        user_message = f"Question: {question}"
     else:
         user_message = question
     
     return system_message, user_message
 
 
-
 def get_regenerate_prompt(question: str, previous_answer: str, context: str = "", bot_type: str = "constitution") -> tuple[str, str]:
     """
     Generate system and user prompts for regenerating an answer after detecting hallucinations.
     
+    The context itself is sent in the same prompt prefix as the original
+    answer (see get_prompt_prefix), so the regeneration call reuses its cache.
+    
     Args:
         question: The user's question
         previous_answer: The previous answer that had hallucinations
@@ -80,10 +146,9 @@ def get_regenerate_prompt(question: str, previous_answer: str, context: str = ""
             "Please provide a short and corrected answer. If you don't have enough information, say so."
          )
         
-        # User prompt - includes context, previous answer, and question
+        # User prompt - previous answer and question (the context precedes it in the prefix)
         if context:
             user_message = (
-                f"Context:\n{context}\n\n"
                 f"Previous answer (had hallucinations): {previous_answer}\n\n"
                 f"Question: {question}\n\n"
                 f"Please provide a short and corrected customer service answer based strictly on the context above. If you don't have enough information, say so."
@@ -105,7 +170,6 @@ def get_regenerate_prompt(question: str, previous_answer: str, context: str = ""
         
         if context:
             user_message = (
-                f"Context:\n{context}\n\n"
                 f"Previous answer (had hallucinations): {previous_answer}\n\n"
                 f"Question: {question}\n\n"
                 f"Please provide a short and corrected fitness answer based strictly on the context above."
@@ -125,10 +189,9 @@ def get_regenerate_prompt(question: str, previous_answer: str, context: str = ""
             "Please provide a short and corrected answer. If you don't have enough information, say so."
         )
         
-        # User prompt - includes context, previous answer, and question
+        # User prompt - previous answer and question (the context precedes it in the prefix)
         if context:
             user_message = (
-                f"Context:\n{context}\n\n"
                 f"Previous answer (had hallucinations): {previous_answer}\n\n"
                 f"Question: {question}\n\n"
                 f"Please provide a short and corrected answer based strictly on the context above."
@@ -141,8 +204,3 @@ def get_regenerate_prompt(question: str, previous_answer: str, context: str = ""
             )
     
     return system_message, user_message
-
-
-
-
-
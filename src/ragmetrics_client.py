@@ -1,12 +1,30 @@
 """RagMetrics API client for sending evaluation data."""
 
 import logging
+import random
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any
+from urllib3.exceptions import NewConnectionError
 from config.settings import settings
+from src.latency import LatencyHistograms
 
 logger = logging.getLogger(__name__)
 
+# Statuses meaning the evaluation was not processed, so the (non-idempotent) POST is safe to repeat.
+# Other 5xx responses (e.g. a 504 from a proxy) may follow a recorded evaluation and are retried
+# only when the server sends Retry-After.
+RETRY_STATUS_CODES = frozenset({429, 503})
+
+
+def _request_not_sent(error: requests.exceptions.ConnectionError) -> bool:
+    """Whether a connection error happened before the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
 
 class RagMetricsClient:
     """Client for sending evaluation data to RagMetrics API."""
@@ -15,6 +33,11 @@ class RagMetricsClient:
         """
         Initialize RagMetrics client with API key and base URL.
         
+        Requests go through one pooled, keep-alive requests.Session, so
+        evaluations after the first reuse the open TLS connection. Throttled
+        (429) and unavailable (503) responses are retried with jittered
+        exponential backoff; latencies are recorded per status code.
+        
         Args:
             eval_group_id: Optional eval group ID override (defaults to settings.ragmetrics_eval_group_id)
         """
@@ -30,6 +53,21 @@ class RagMetricsClient:
         self.eval_type = settings.ragmetrics_type
         self.conversation_id = settings.ragmetrics_conversation_id
         self.endpoint = f"{self.base_url}/v2/single-evaluation/"
+        self.timeout = (settings.ragmetrics_connect_timeout, settings.ragmetrics_read_timeout)
+        self.max_retries = settings.ragmetrics_max_retries
+        self.backoff = settings.ragmetrics_backoff
+        self.backoff_max = settings.ragmetrics_backoff_max
+        self.latency = LatencyHistograms()
+        
+        self.session = requests.Session()
+        # Retries are handled in _post (status-aware, jittered); the adapter only pools
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.ragmetrics_pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Token {self.api_key}",
+            "Content-Type": "application/json"
+        })
     
     def send_evaluation(
         self,
@@ -61,18 +99,8 @@ class RagMetricsClient:
             "conversation_id": self.conversation_id
         }
         
-        headers = {
-            "Authorization": f"Token {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.post(
-                self.endpoint,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
+            response = self._post(payload)
             
             # Accept any 2xx status code as success (200, 201, 202, etc.)
             if 200 <= response.status_code < 300:
@@ -130,4 +158,66 @@ class RagMetricsClient:
         except requests.exceptions.RequestException as e:
             logger.error(f"Error sending evaluation to RagMetrics: {str(e)}")
             return None
-
+    
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """
+        POST a payload to the evaluation endpoint, retrying throttling and transient failures.
+        
+        Evaluations are not idempotent, so only failures where the request
+        was not processed are retried (up to max_retries times, with
+        full-jitter exponential backoff honouring a numeric Retry-After
+        header): 429 and 503 responses, other 5xx responses carrying
+        Retry-After, and connections that could not be established. Read
+        timeouts, dropped connections and plain 500/502/504 responses are
+        not retried, since the evaluation may already have been recorded.
+        
+        Args:
+            payload: JSON payload
+            
+        Returns:
+            The last response
+            
+        Raises:
+            requests.exceptions.RequestException: If the request failed on every attempt
+        """
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.endpoint, json=payload, timeout=self.timeout)
+            except requests.exceptions.ConnectionError as e:
+                # ReadTimeout is not a ConnectionError and falls through to the handler below
+                self.latency.record(type(e).__name__, time.perf_counter() - start)
+                if attempt == self.max_retries or not _request_not_sent(e):
+                    raise
+                delay = self._backoff_delay(attempt, None)
+                logger.warning(f"RagMetrics connection failed ({str(e)}), retrying in {delay:.2f}s")
+            except requests.exceptions.RequestException as e:
+                self.latency.record(type(e).__name__, time.perf_counter() - start)
+                raise
+            else:
+                self.latency.record(response.status_code, time.perf_counter() - start)
+                retry_after = response.headers.get("Retry-After")
+                retryable = response.status_code in RETRY_STATUS_CODES or (response.status_code >= 500 and retry_after)
+                if not retryable or attempt == self.max_retries:
+                    return response
+                delay = self._backoff_delay(attempt, retry_after)
+                logger.warning(f"RagMetrics API returned status {response.status_code}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt (at least Retry-After seconds)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+        try:
+            return max(delay, min(float(retry_after), self.backoff_max)) if retry_after else delay
+        except ValueError:
+            # HTTP-date Retry-After values are not worth parsing here
+            return delay
+    
+    def latency_stats(self) -> Dict[Any, Dict[str, Any]]:
+        """
+        Get request latency histograms per HTTP status code (or exception name).
+        
+        Returns:
+            Per status: count, mean/max/p50/p95 in ms and bucket counts
+        """
+        return self.latency.snapshot()
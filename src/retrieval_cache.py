@@ -0,0 +1,166 @@
+"""Retrieval-result cache in front of vector index queries."""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from config.settings import settings
+from src.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCache:
+    """
+    Cache of formatted context and raw matches keyed on
+    (index name, namespace, top_k, variant, embedding hash).
+
+    Each index has a stamp file under ``stamp_dir``. Invalidating an index
+    rewrites its stamp, so entries cached by any process before the upsert
+    (including a running web UI) are never served again.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None, stamp_dir: Optional[str] = None):
+        """
+        Initialize the retrieval cache.
+
+        Args:
+            maxsize: Maximum number of cached retrievals
+            ttl: Optional time-to-live in seconds
+            stamp_dir: Directory holding per-index invalidation stamps (None for in-process only)
+        """
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.stamp_dir = stamp_dir
+        self.invalidations = 0
+
+    def _stamp_path(self, index_name: str) -> Optional[str]:
+        if not self.stamp_dir:
+            return None
+        return os.path.join(self.stamp_dir, f"{index_name}.stamp")
+
+    def _read_stamp(self, index_name: str) -> int:
+        """Return the current invalidation stamp of an index (0 if never invalidated)."""
+        path = self._stamp_path(index_name)
+        if path is None:
+            return 0
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def make_key(self, index_name: str, namespace: str, top_k: int, embedding, variant: str = "") -> Tuple[str, str, int, str, str, int]:
+        """
+        Build the cache key for a query.
+
+        The current invalidation stamp of the index is part of the key, so
+        entries cached before an upsert can never be returned afterwards.
+
+        Args:
+            index_name: Vector index name
+            namespace: Index namespace
+            top_k: Number of matches requested
+            embedding: Query embedding vector
+            variant: Retrieval options that change the result for the same query
+                (e.g. the adaptive cutoff of the caller)
+
+        Returns:
+            Tuple of (index_name, namespace, top_k, variant, embedding_hash, stamp)
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        embedding_hash = hashlib.sha1(vector.tobytes()).hexdigest()
+        return index_name, namespace or "", top_k, variant, embedding_hash, self._read_stamp(index_name)
+
+    def get(self, index_name: str, namespace: str, top_k: int, embedding, variant: str = "") -> Optional[Tuple[str, List]]:
+        """
+        Look up a cached retrieval.
+
+        Returns:
+            Tuple of (formatted_context, raw_results), or None on a miss
+        """
+        entry = self.memory.get(self.make_key(index_name, namespace, top_k, embedding, variant))
+        if entry is None:
+            return None
+        formatted_context, results = entry
+        return formatted_context, list(results)
+
+    def set(
+        self,
+        index_name: str,
+        namespace: str,
+        top_k: int,
+        embedding,
+        formatted_context: str,
+        results: List,
+        variant: str = ""
+    ) -> None:
+        """Store a retrieval result."""
+        key = self.make_key(index_name, namespace, top_k, embedding, variant)
+        self.memory.set(key, (formatted_context, list(results)))
+
+    def invalidate(self, index_name: str) -> None:
+        """
+        Invalidate every cached retrieval for an index, in this and other processes.
+
+        Args:
+            index_name: Vector index whose contents changed
+        """
+        path = self._stamp_path(index_name)
+        if path is not None:
+            try:
+                os.makedirs(self.stamp_dir, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(str(time.time_ns()))
+            except OSError as e:
+                logger.warning(f"Could not write invalidation stamp for '{index_name}': {str(e)}")
+        dropped = self.memory.discard_where(lambda key: key[0] == index_name)
+        self.invalidations += 1
+        logger.info(f"Invalidated retrieval cache for index '{index_name}' ({dropped} entries dropped)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics (memory-tier counters plus invalidations)."""
+        stats = self.memory.stats()
+        stats["invalidations"] = self.invalidations
+        return stats
+
+
+_retrieval_cache: Optional[RetrievalCache] = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    """
+    Get the process-wide retrieval cache configured from settings.
+
+    Returns:
+        Shared RetrievalCache, or None when RETRIEVAL_CACHE_SIZE is 0
+    """
+    global _retrieval_cache
+    if settings.retrieval_cache_size <= 0:
+        return None
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = RetrievalCache(
+                    maxsize=settings.retrieval_cache_size,
+                    ttl=settings.retrieval_cache_ttl or None,
+                    stamp_dir=settings.rag_cache_dir
+                )
+    return _retrieval_cache
+
+
+def invalidate_index(index_name: str) -> None:
+    """
+    Invalidate cached retrievals for an index after its vectors changed.
+
+    Called by the upload scripts after an upsert. Works even when the
+    retrieval cache is disabled in this process, so a running app that has
+    it enabled still sees the new stamp.
+
+    Args:
+        index_name: Vector index that was modified
+    """
+    cache = get_retrieval_cache() or RetrievalCache(maxsize=0, stamp_dir=settings.rag_cache_dir)
+    cache.invalidate(index_name)
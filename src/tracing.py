@@ -0,0 +1,109 @@
+"""Level-guarded, lazily formatted tracing for the retrieval hot path."""
+
+import logging
+import random
+from typing import Any, Callable
+from config.settings import settings
+
+TRACE_LOGGER_NAME = "rag.trace"
+
+
+class _Lazy:
+    """Defers building a log value until a handler actually formats the record."""
+
+    __slots__ = ("factory", "max_chars")
+
+    def __init__(self, factory: Callable[[], Any], max_chars: int):
+        self.factory = factory
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        text = str(self.factory())
+        if self.max_chars and len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... [{len(text)} chars]"
+        return text
+
+
+class RagTracer:
+    """
+    Structured trace events for retrieval, off by default.
+
+    Events are emitted at DEBUG level on the ``rag.trace`` logger and every
+    call is guarded by ``enabled``, so when tracing is off no payload is
+    converted to a string. Large payload dumps are additionally sampled.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, max_chars: int = 2000):
+        """
+        Initialize the tracer.
+
+        Args:
+            enabled: Turn tracing on (RAG_TRACE); also on when rag.trace is set to DEBUG elsewhere
+            sample_rate: Fraction of queries (0.0-1.0) whose payloads are dumped
+            max_chars: Maximum characters of any single payload dump (0 for unlimited)
+        """
+        self.logger = logging.getLogger(TRACE_LOGGER_NAME)
+        if enabled:
+            self.logger.setLevel(logging.DEBUG)
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+
+    @property
+    def enabled(self) -> bool:
+        """True when trace events would be emitted."""
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def sampled(self) -> bool:
+        """
+        Decide whether this query's payloads should be dumped.
+
+        Returns:
+            True if tracing is enabled and the query falls within the sample rate
+        """
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def event(self, name: str, **fields: Any) -> None:
+        """
+        Emit a structured trace event (``name key=value ...``).
+
+        Args:
+            name: Event name, e.g. "pinecone.query"
+            **fields: Event fields; callables are invoked lazily to produce the value
+        """
+        if not self.enabled:
+            return
+        parts = [name]
+        args = []
+        for key, value in fields.items():
+            parts.append(f"{key}=%s")
+            args.append(_Lazy(value, self.max_chars) if callable(value) else value)
+        self.logger.debug(" ".join(parts), *args)
+
+    def payload(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Emit a (truncated) payload dump, e.g. a full Pinecone response.
+
+        Callers should check ``sampled()`` once per query and only call this
+        when it returned True.
+
+        Args:
+            name: Payload name
+            factory: Callable producing the payload object
+        """
+        if self.enabled:
+            self.logger.debug("%s payload=%s", name, _Lazy(factory, self.max_chars))
+
+
+_tracer = None
+
+
+def get_tracer() -> RagTracer:
+    """Get the process-wide retrieval tracer configured from settings."""
+    global _tracer
+    if _tracer is None:
+        _tracer = RagTracer(
+            enabled=settings.rag_trace,
+            sample_rate=settings.rag_trace_sample_rate,
+            max_chars=settings.rag_trace_max_chars
+        )
+    return _tracer
@@ -34,3 +34,73 @@ def format_context(results: list) -> str:
     return "\n\n".join(context_parts)
 
 
+def format_usage_stats(stats: dict) -> str:
+    """
+    Format OpenAIClient.usage_stats() as a one-line prompt cache summary.
+    
+    Args:
+        stats: Dictionary from OpenAIClient.usage_stats()
+        
+    Returns:
+        Summary line (empty string before the first completion)
+    """
+    if not stats.get("calls"):
+        return ""
+    return (
+        f"Prompt cache: {stats['cached_tokens']}/{stats['prompt_tokens']} prompt tokens cached "
+        f"({stats['cached_ratio']:.0%}) over {stats['calls']} OpenAI calls"
+    )
+
+
+def print_usage_stats(engine) -> None:
+    """Print the prompt cache summary of an engine's OpenAI client (CLI exit)."""
+    summary = format_usage_stats(engine.openai_client.usage_stats())
+    if summary:
+        print(summary)
+
+
+class AnswerPrinter:
+    """
+    Prints a streamed answer on the CLI as its tokens arrive.
+    
+    Pass the instance as ``on_token`` to ``process_question``: the first
+    token replaces the "Processing..." line with the answer header, later
+    tokens are appended in place. Call ``finish()`` once the answer is
+    complete.
+    """
+    
+    def __init__(self, width: int = 60):
+        """
+        Initialize the printer.
+        
+        Args:
+            width: Width of the separator lines
+        """
+        self.width = width
+        self.started = False
+    
+    def _start(self) -> None:
+        print("\r" + " " * self.width + "\r" + "-" * self.width)
+        print("Bot: ", end='', flush=True)
+        self.started = True
+    
+    def __call__(self, token: str) -> None:
+        if not self.started:
+            token = token.lstrip()
+            if not token:
+                return
+            self._start()
+        print(token, end='', flush=True)
+    
+    def finish(self, answer: Optional[str] = None) -> None:
+        """
+        End the answer block.
+        
+        Args:
+            answer: Full answer, printed if nothing was streamed (e.g. empty stream)
+        """
+        if not self.started:
+            self._start()
+            print(answer or "", end='')
+        print()
+        print("-" * self.width)
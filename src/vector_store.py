@@ -0,0 +1,180 @@
+"""
+Memory-mapped vector store file format for local retrieval.
+
+Layout (little-endian, sections 64-byte aligned)::
+
+    magic     8 bytes   b"RAGVEC1\\0"
+    length    uint64    size of the JSON header
+    header    JSON      dimension, count, dtype, metric, namespaces, section offsets
+    vectors   count x dimension float32 or float16, row-major
+    text_offsets    uint64[count + 1]   chunk text i is text[text_offsets[i]:text_offsets[i + 1]]
+    record_offsets  uint64[count + 1]   same for the JSON records ({'id', 'metadata'} minus text)
+    text      UTF-8 chunk texts, concatenated
+    records   UTF-8 JSON records, concatenated
+
+Opening a store maps the file read-only with ``np.memmap``: the vector
+matrix is a zero-copy view, and chunk text and metadata are decoded only for
+the rows a query returns. Several processes (e.g. Streamlit workers) mapping
+the same file share one copy in the page cache.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RAGVEC1\0"
+ALIGNMENT = 64
+DTYPES = ("float32", "float16")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _offsets(blobs: List[bytes]) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum([len(blob) for blob in blobs], dtype=np.uint64)]).astype("<u8")
+
+
+def write_vector_store(
+    path: str,
+    namespaces: Iterable[Tuple[str, Sequence[str], np.ndarray, Sequence[Optional[dict]]]],
+    dimension: int,
+    metric: str = "cosine",
+    dtype: str = "float32"
+) -> None:
+    """
+    Write a vector store file atomically.
+
+    The file is written to a temporary path and renamed, so processes that
+    already mapped the previous version keep reading it until they reopen.
+
+    Args:
+        path: Destination file path
+        namespaces: (name, ids, vectors (n, dimension), metadata) per namespace
+        dimension: Vector dimension
+        metric: Similarity metric the vectors were prepared for
+        dtype: Stored vector type, "float32" or "float16" (half the size, slightly less precise)
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}', expected one of {DTYPES}")
+
+    matrices, texts, records, ranges = [], [], [], []
+    for name, ids, vectors, metadata in namespaces:
+        ranges.append({"name": name, "start": len(texts), "count": len(ids)})
+        matrices.append(np.asarray(vectors, dtype=dtype).reshape(len(ids), dimension))
+        for vector_id, meta in zip(ids, metadata):
+            meta = dict(meta or {})
+            text = meta.pop("text", "")
+            texts.append((text if isinstance(text, str) else str(text)).encode("utf-8"))
+            records.append(json.dumps({"id": vector_id, "metadata": meta}).encode("utf-8"))
+    vectors = np.vstack(matrices) if matrices else np.empty((0, dimension), dtype=dtype)
+    text_offsets = _offsets(texts)
+    record_offsets = _offsets(records)
+
+    # Section offsets are relative to the start of the (aligned) data area
+    sections = {}
+    position = 0
+    for section, size in (
+        ("vectors", vectors.nbytes),
+        ("text_offsets", text_offsets.nbytes),
+        ("record_offsets", record_offsets.nbytes),
+        ("text", int(text_offsets[-1])),
+        ("records", int(record_offsets[-1]))
+    ):
+        sections[section] = position
+        position = _align(position + size)
+    header = json.dumps({
+        "dimension": dimension,
+        "count": len(vectors),
+        "dtype": dtype,
+        "metric": metric,
+        "namespaces": ranges,
+        "sections": sections
+    }).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).astype("<u8").tobytes())
+        f.write(header)
+        for section, payload in (
+            ("vectors", vectors.astype(f"<{np.dtype(dtype).str[1:]}", copy=False).tobytes()),
+            ("text_offsets", text_offsets.tobytes()),
+            ("record_offsets", record_offsets.tobytes()),
+            ("text", b"".join(texts)),
+            ("records", b"".join(records))
+        ):
+            f.seek(data_start + sections[section])
+            f.write(payload)
+        f.truncate(data_start + position)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote vector store with {len(vectors)} {dtype} vectors to {path}")
+
+
+class VectorStore:
+    """Read-only, memory-mapped view of a vector store file."""
+
+    def __init__(self, path: str):
+        """
+        Map a vector store file.
+
+        Args:
+            path: File written by ``write_vector_store()``
+        """
+        self.path = path
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a vector store file")
+        header_length = int(self._buffer[len(MAGIC):len(MAGIC) + 8].view("<u8")[0])
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(self._buffer[header_start:header_start + header_length]).decode("utf-8"))
+        data_start = _align(header_start + header_length)
+
+        self.dimension: int = header["dimension"]
+        self.count: int = header["count"]
+        self.dtype: str = header["dtype"]
+        self.metric: str = header["metric"]
+        self.namespaces: Dict[str, Tuple[int, int]] = {
+            ns["name"]: (ns["start"], ns["count"]) for ns in header["namespaces"]
+        }
+        sections = {name: data_start + offset for name, offset in header["sections"].items()}
+
+        itemsize = np.dtype(self.dtype).itemsize
+        self.vectors = self._section(sections["vectors"], self.count * self.dimension * itemsize, f"<{np.dtype(self.dtype).str[1:]}")
+        self.vectors = self.vectors.reshape(self.count, self.dimension)
+        self.text_offsets = self._section(sections["text_offsets"], (self.count + 1) * 8, "<u8")
+        self.record_offsets = self._section(sections["record_offsets"], (self.count + 1) * 8, "<u8")
+        self._text_start = sections["text"]
+        self._records_start = sections["records"]
+
+    def _section(self, start: int, size: int, dtype: str) -> np.ndarray:
+        """Zero-copy typed view of a section of the mapped file."""
+        return self._buffer[start:start + size].view(dtype)
+
+    def get_text(self, row: int) -> str:
+        """Chunk text of a row."""
+        start = self._text_start + int(self.text_offsets[row])
+        end = self._text_start + int(self.text_offsets[row + 1])
+        return bytes(self._buffer[start:end]).decode("utf-8")
+
+    def get_record(self, row: int) -> Dict[str, Any]:
+        """Stored {'id', 'metadata'} record of a row (metadata without the text)."""
+        start = self._records_start + int(self.record_offsets[row])
+        end = self._records_start + int(self.record_offsets[row + 1])
+        return json.loads(bytes(self._buffer[start:end]).decode("utf-8"))
+
+    def get_id(self, row: int) -> str:
+        """Vector id of a row."""
+        return self.get_record(row)["id"]
+
+    def get_metadata(self, row: int) -> Dict[str, Any]:
+        """Full metadata of a row, including its chunk text under 'text'."""
+        metadata = self.get_record(row)["metadata"]
+        metadata["text"] = self.get_text(row)
+        return metadata
@@ -0,0 +1,64 @@
+"""
+Build the local index for the constitution PDF (and optionally upload it to Pinecone).
+
+The Pinecone constitution index is already populated, so it is only
+re-uploaded with --pinecone; by default this writes the local index used
+with RAG_BACKEND=local.
+"""
+
+import argparse
+import sys
+import logging
+import os
+from config.settings import settings
+from src.pdf_ingest import ingest_pdf
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main function to build the local index (and optionally upload the PDF to Pinecone)."""
+    parser = argparse.ArgumentParser(description="Index Docs/constitution.pdf")
+    parser.add_argument("--pinecone", action="store_true",
+                        help="Also upload the chunks to the Pinecone constitution index (required unless RAG_BACKEND=local)")
+    args = parser.parse_args()
+    pdf_path = "Docs/constitution.pdf"
+
+    # With the Pinecone backend the local files only feed hybrid retrieval (BM25).
+    # Their chunk ids must match the Pinecone vectors, or RRF would return the
+    # same passage twice, so they are only written together with an upload.
+    if settings.rag_backend != "local" and not args.pinecone:
+        logger.error(
+            "RAG_BACKEND=pinecone: pass --pinecone to re-upload the constitution index "
+            "(its BM25 index must share the Pinecone chunk ids), or set RAG_BACKEND=local"
+        )
+        sys.exit(1)
+
+    # Check if PDF exists
+    if not os.path.exists(pdf_path):
+        logger.error(f"PDF file not found: {pdf_path}")
+        sys.exit(1)
+
+    try:
+        ingest_pdf(
+            pdf_path,
+            index_name=settings.pinecone_index_name,
+            source="constitution.pdf",
+            id_prefix="constitution",
+            upload_pinecone=args.pinecone,
+            namespace=settings.pinecone_namespace
+        )
+    except Exception as e:
+        logger.error(f"Fatal error: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
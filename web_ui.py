@@ -2,7 +2,7 @@
 
 import streamlit as st
 import logging
-from src.utils import setup_logging
+from src.utils import setup_logging, format_usage_stats
 from src.chat_engine import ChatEngine
 from config.settings import Settings, get_settings
 
@@ -298,6 +298,10 @@ def main():
     
     # Single column layout for conversation
     st.subheader(f"Ask questions about {topic}")
+    # Prompt cache effectiveness of the shared OpenAI client (all sessions of this process)
+    usage_summary = format_usage_stats(st.session_state.chat_engine.openai_client.usage_stats())
+    if usage_summary:
+        st.caption(usage_summary)
     
     # Display all conversation history (scrolling up)
     for entry in st.session_state.conversation_history:
@@ -342,11 +346,14 @@ def main():
                     st.write(truncated_answer)
     
     # Show current question if processing
+    answer_placeholder = None
     if st.session_state.is_processing and st.session_state.current_question:
         with st.chat_message("user"):
             st.write(st.session_state.current_question)
         with st.chat_message("assistant"):
-            st.write("Processing...")
+            # Replaced by the streamed answer once the first token arrives
+            answer_placeholder = st.empty()
+            answer_placeholder.write("Processing...")
     
     # Process pending question if any (show question first)
     if st.session_state.pending_question and not st.session_state.is_processing:
@@ -373,8 +380,20 @@ def main():
             # Mark as started to prevent reprocessing
             st.session_state.processing_started = True
             
-            # Process question
-            result = st.session_state.chat_engine.process_question(st.session_state.current_question)
+            # Process question, streaming the answer into the assistant message
+            streamed = []
+            
+            def show_token(token):
+                streamed.append(token)
+                if answer_placeholder is not None:
+                    answer_placeholder.markdown("".join(streamed).lstrip() + "▌")
+            
+            result = st.session_state.chat_engine.process_question(
+                st.session_state.current_question,
+                on_token=show_token
+            )
+            if answer_placeholder is not None:
+                answer_placeholder.markdown(result["answer"])
             
             # Fast Constitution uses evaluation_result; others use ragmetrics_result
             if st.session_state.bot_type == "fast_constitution":